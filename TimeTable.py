@@ -1,24 +1,26 @@
 import pandas as pd
 import re
+import openpyxl
 from openpyxl import load_workbook
+from openpyxl.styles.cell_style import StyleArray
 from openpyxl.utils import get_column_letter
 
 file = "Time-Table, FSC, Fall-2025.xlsx"
 
-def get_merged_cell_value(ws, row, col):
+def merged_top_left(ws):
+    """Map every cell inside a merged range to that range's top-left cell"""
+    lookup = {}
     for merged_range in ws.merged_cells.ranges:
-        if (row, col) in merged_range.cells:
-            tl_cell = ws.cell(row=merged_range.min_row, column=merged_range.min_col)
-            return tl_cell.value
-    return ws.cell(row=row, column=col).value
+        top_left = (merged_range.min_row, merged_range.min_col)
+        for cell in merged_range.cells:
+            lookup[cell] = top_left
+    return lookup
 
-def get_merged_cell_color(ws, row, col):
-    """Get color from merged cell's top-left corner or from the cell itself"""
-    for merged_range in ws.merged_cells.ranges:
-        if (row, col) in merged_range.cells:
-            tl_cell = ws.cell(row=merged_range.min_row, column=merged_range.min_col)
-            return normalize_color(tl_cell.fill.fgColor)
-    return normalize_color(ws.cell(row=row, column=col).fill.fgColor)
+def get_merged_cell_value(ws, row, col, merged=None):
+    if merged is None:
+        merged = merged_top_left(ws)
+    row, col = merged.get((row, col), (row, col))
+    return ws.cell(row=row, column=col).value
 
 def normalize_color(fgColor):
     if fgColor and fgColor.type == "rgb" and fgColor.rgb:
@@ -37,9 +39,7 @@ def normalize_time_str(time_str):
     time_str = re.sub(r'(\d{1,2}):(\d{2})', pad_hour, time_str)
     return time_str
 
-def extract_color_batch_map(file_path, sheet_name):
-    wb = load_workbook(file_path, data_only=False)
-    ws = wb[sheet_name]
+def extract_color_batch_map(ws):
     mapping = {}
     ignore_words = ["monday", "tuesday", "wednesday", "thursday", "friday",
                     "room", "timetable", "time", "slot"]
@@ -55,6 +55,63 @@ def extract_color_batch_map(file_path, sheet_name):
                 mapping[color] = text
     return mapping
 
+def get_workbook_legend(wb, sheet_names):
+    """Color -> batch across every day sheet's legend"""
+    legend = {}
+    for name in sheet_names:
+        for color, batch in extract_color_batch_map(wb[name]).items():
+            if legend.get(color, batch) != batch:
+                print(f"Warning: legend color {color} is '{legend[color]}' on one sheet and '{batch}' on {name}")
+            legend[color] = batch
+    return legend
+
+def fill_color(fill):
+    # Fill 0 is "no fill": its fgColor defaults to black but nothing is painted
+    if getattr(fill, "patternType", None) is None:
+        return None
+    return normalize_color(getattr(fill, "fgColor", None))
+
+def fill_internals(wb):
+    """Return (fills, fill_id): the workbook's fills indexed by fill id, and
+    fill_id(cell) giving the id a cell uses. These are private openpyxl
+    attributes (Workbook._fills, Cell._style.fillId), checked against
+    openpyxl 3.1.5. The cell loops swallow every exception, so a missing
+    attribute is caught here rather than showing up as batch=None."""
+    fills = getattr(wb, "_fills", None)
+    cell = wb.worksheets[0].cell(row=1, column=1)
+    if fills is None or not hasattr(cell, "_style") or not hasattr(StyleArray(), "fillId"):
+        raise RuntimeError(f"openpyxl {openpyxl.__version__} has no Workbook._fills or "
+                           "Cell._style.fillId; update TimeTable.fill_internals")
+
+    def fill_id(cell):
+        # Cells that were never styled have no style array: fill 0, like openpyxl's own descriptors
+        return cell._style.fillId if cell._style else 0
+    return fills, fill_id
+
+def build_fill_batch_map(fills, legend):
+    """Resolve each of the workbook's fills to a batch once, indexed by fill id"""
+    return [legend.get(fill_color(fill)) for fill in fills]
+
+def make_batch_resolver(ws, fill_batches, fill_id, merged, used_fills):
+    """Return batch_of(row, col): the batch of a cell's (merged) fill by integer lookup"""
+    def batch_of(row, col):
+        row, col = merged.get((row, col), (row, col))
+        cell_fill = fill_id(ws.cell(row=row, column=col))
+        used_fills.add(cell_fill)
+        return fill_batches[cell_fill]
+    return batch_of
+
+def report_legend_coverage(fills, legend, used_fills):
+    used_colors = {fill_color(fills[fill_id]) for fill_id in used_fills}
+    unused = sorted(color for color in legend if color not in used_colors)
+    if unused:
+        print("Warning: legend colors not used by any cell: " +
+              ", ".join(f"{color} ({legend[color]})" for color in unused))
+    unmatched = sorted(color for color in used_colors
+                       if color and color != "#FFFFFF" and color not in legend)
+    if unmatched:
+        print("Warning: cell colors that match no legend entry: " + ", ".join(unmatched))
+
 def parse_time_to_minutes(time_str):
     try:
         parts = time_str.split(':')
@@ -149,7 +206,7 @@ def parse_course_and_time(raw_course, column_time):
         return actual_time, "Free Slot", None, None
     return actual_time, final_course_name, section, clean_course
 
-def process_lab_section(df, day_name, color_batch_map, ws, header_row_excel):
+def process_lab_section(df, day_name, batch_of, header_row_excel):
     lab_start_idx = df[df.iloc[:, 0].astype(str).str.contains("Lab", case=False, na=False)].index
     if len(lab_start_idx) == 0:
         return pd.DataFrame()
@@ -184,14 +241,14 @@ def process_lab_section(df, day_name, color_batch_map, ws, header_row_excel):
                 section = None
                 excel_col = col_idx + 1
                 try:
-                    batch = color_batch_map.get(get_merged_cell_color(ws, excel_row, excel_col), None)
+                    batch = batch_of(excel_row, excel_col)
                 except:
                     batch = None
             else:
                 final_course_name = course_name
                 excel_col = col_idx + 1
                 try:
-                    batch = color_batch_map.get(get_merged_cell_color(ws, excel_row, excel_col), None)
+                    batch = batch_of(excel_row, excel_col)
                 except:
                     batch = None
             if (final_course_name not in ["Free Slot (Lab)", "FSM"] and
@@ -208,14 +265,13 @@ def process_lab_section(df, day_name, color_batch_map, ws, header_row_excel):
             })
     return pd.DataFrame(results)
 
-def reshape_timetable(df, day_name):
+def reshape_timetable(df, day_name, wb, fill_batches, fill_id, used_fills):
     original_df = df.copy()
     df = df.dropna(how="all").dropna(axis=1, how="all").reset_index(drop=True)
     header_row_index = df.index[df.iloc[:, 0].astype(str).str.contains("Room", case=False, na=False)]
     if len(header_row_index) == 0:
         return pd.DataFrame(columns=["Day", "Course Name", "Class Time", "Room No", "Section", "Batch", "Type"])
     header_row_pandas = header_row_index[0]
-    wb = load_workbook(file, data_only=False)
     ws = wb[day_name]
     header_row_excel = None
     for row_num in range(1, 20):
@@ -225,11 +281,14 @@ def reshape_timetable(df, day_name):
             break
     if header_row_excel is None:
         return pd.DataFrame(columns=["Day", "Course Name", "Class Time", "Room No", "Section", "Batch", "Type"])
-    color_batch_map = extract_color_batch_map(file, day_name)
+    merged = merged_top_left(ws)
+    batch_of = make_batch_resolver(ws, fill_batches, fill_id, merged, used_fills)
     df.columns = df.iloc[header_row_pandas]
     df = df.iloc[header_row_pandas + 1:].reset_index(drop=True)
     excel_df_mapping, excel_time_cols = create_excel_to_dataframe_mapping(ws, df.columns, header_row_excel)
-    time_columns = list(set(
+    # dict.fromkeys keeps first-seen order, so reparsing the same workbook
+    # gives the same rows in the same order (a set did not across processes)
+    time_columns = list(dict.fromkeys(
         [normalize_time_str(c) for c in df.columns if re.search(r'\d{1,2}:\d{2}-\d{1,2}:\d{2}', str(c))] +
         list(excel_time_cols.values())
     ))
@@ -245,7 +304,7 @@ def reshape_timetable(df, day_name):
             # Get course content from merged cell if applicable
             if excel_col is not None:
                 excel_row = header_row_excel + 1 + r_idx
-                excel_value = get_merged_cell_value(ws, excel_row, excel_col)
+                excel_value = get_merged_cell_value(ws, excel_row, excel_col, merged)
                 if excel_value not in [None, ""]:
                     raw_course = excel_value
             
@@ -276,9 +335,8 @@ def reshape_timetable(df, day_name):
             if excel_col is not None:
                 excel_row = header_row_excel + 1 + r_idx
                 try:
-                    # Use the new function that handles merged cells properly
-                    cell_color = get_merged_cell_color(ws, excel_row, excel_col)
-                    batch = color_batch_map.get(cell_color, None)
+                    # Fill ids resolve to batches once per workbook, see build_fill_batch_map
+                    batch = batch_of(excel_row, excel_col)
                 except:
                     pass
             
@@ -292,7 +350,7 @@ def reshape_timetable(df, day_name):
                 "Type": "Class",
             })
     
-    lab_results = process_lab_section(original_df, day_name, color_batch_map, ws, header_row_excel)
+    lab_results = process_lab_section(original_df, day_name, batch_of, header_row_excel)
     final_df = pd.DataFrame(results)
     if not lab_results.empty:
         final_df = pd.concat([final_df, lab_results], ignore_index=True)
@@ -300,13 +358,21 @@ def reshape_timetable(df, day_name):
     return final_df
 
 def get_time_table():
-    sheet_names = pd.ExcelFile(file).sheet_names
+    excel = pd.ExcelFile(file)
+    sheet_names = excel.sheet_names
     time_table_data = {}
     for names in sheet_names:
         if names != "Welcome":
-            data = pd.read_excel(file, sheet_name=names)
+            data = pd.read_excel(excel, sheet_name=names)
             time_table_data[names] = data
-    event_tables = {day: reshape_timetable(time_table_data[day], day) for day in time_table_data}
+    wb = load_workbook(file, data_only=False)
+    legend = get_workbook_legend(wb, list(time_table_data))
+    fills, fill_id = fill_internals(wb)
+    fill_batches = build_fill_batch_map(fills, legend)
+    used_fills = set()
+    event_tables = {day: reshape_timetable(time_table_data[day], day, wb, fill_batches, fill_id, used_fills)
+                    for day in time_table_data}
+    report_legend_coverage(fills, legend, used_fills)
     all_days_df = pd.concat(event_tables.values())
     unwanted_slots = ["05:20-06:40", "06:45-08:05", "05:20-08:05 (inc. 10 min. break)"]
     all_days_df = all_days_df[~all_days_df["Class Time"].isin(unwanted_slots)]
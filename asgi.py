@@ -0,0 +1,130 @@
+"""ASGI entry point for the read-only timetable queries.
+
+    uvicorn asgi:app --port 8000
+
+Serves /, /get_filtered_timetable, /get_sections, /get_facets and
+/get_free_rooms from the same snapshot and indexes as main.py, so one
+event loop can hold thousands of idle keep-alive connections. /reload
+parses in a worker thread and the loop keeps answering from the old
+snapshot meanwhile. Every other route is only served by the Flask app.
+"""
+import asyncio
+import json
+import os
+from urllib.parse import parse_qsl
+
+from flask import render_template
+
+import main
+
+MAX_BODY = 64 * 1024
+
+def form_data(body):
+    # Like request.form.get, the first value of a repeated field wins
+    form = {}
+    for name, value in parse_qsl(body.decode('utf-8', 'replace'), keep_blank_values=True):
+        form.setdefault(name, value)
+    return form
+
+def json_body(obj):
+    # Same bytes jsonify produces
+    return json.dumps(obj, separators=(',', ':'), sort_keys=True).encode('utf-8') + b'\n'
+
+def index(form):
+    with main.app.app_context():
+        return 200, 'text/html; charset=utf-8', render_template('index.html', **main.snapshot.options).encode('utf-8')
+
+def get_filtered_timetable(form):
+    snap = main.snapshot
+    return 200, 'application/json', json_body(main.render_timetable(
+        snap,
+        form.get('day'),
+        form.get('batch'),
+        form.get('section'),
+        form.get('class_type', 'All'),
+    ))
+
+def get_sections(form):
+    batch = form.get('batch')
+    sections = main.snapshot.facets.values('section', {'batch': batch}) if batch else []
+    return 200, 'application/json', json_body({'sections': sections})
+
+def get_facets(form):
+    selection = {field: form.get(field, 'All') for field in main.FACET_COLUMNS}
+    return 200, 'application/json', json_body(main.snapshot.facets.facets(selection))
+
+def get_free_rooms(form):
+    day = form.get('day')
+    time_slot = form.get('time_slot', '').strip()
+    if not day or day == 'All':
+        return 200, 'application/json', json_body({'error': 'Please select a day'})
+    return 200, 'application/json', json_body(main.find_free_rooms(main.snapshot, day, time_slot))
+
+# Path -> (method, handler). Handlers are plain functions: each one is an
+# in-memory lookup on an immutable snapshot, so they run on the loop itself.
+ROUTES = {
+    '/': ('GET', index),
+    '/get_filtered_timetable': ('POST', get_filtered_timetable),
+    '/get_sections': ('POST', get_sections),
+    '/get_facets': ('POST', get_facets),
+    '/get_free_rooms': ('POST', get_free_rooms),
+}
+
+async def reload(headers):
+    token = os.environ.get('ADMIN_TOKEN')
+    if not token or headers.get(b'x-admin-token', b'').decode('latin-1') != token:
+        return 403, 'application/json', json_body({'error': 'Forbidden'})
+    # Parsing takes seconds; run it off the loop so queries keep being answered
+    snap = await asyncio.get_running_loop().run_in_executor(None, main.reload_timetable)
+    return 200, 'application/json', json_body({'version': snap.version, 'count': len(snap.records)})
+
+async def read_body(receive):
+    body = b''
+    while True:
+        message = await receive()
+        body += message.get('body', b'')
+        if len(body) > MAX_BODY:
+            return None
+        if not message.get('more_body'):
+            return body
+
+async def send_response(send, status, content_type, body):
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [
+            (b'content-type', content_type.encode('latin-1')),
+            (b'content-length', str(len(body)).encode('latin-1')),
+        ],
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+async def lifespan(receive, send):
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+async def app(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        return await lifespan(receive, send)
+    if scope['type'] != 'http':
+        return
+
+    body = await read_body(receive)
+    if body is None:
+        return await send_response(send, 413, 'application/json', json_body({'error': 'Request body too large'}))
+
+    path = scope['path']
+    if path == '/reload' and scope['method'] == 'POST':
+        return await send_response(send, *await reload(dict(scope['headers'])))
+    route = ROUTES.get(path)
+    if route is None:
+        return await send_response(send, 404, 'application/json', json_body({'error': f'{path} is not served in async mode'}))
+    method, handler = route
+    if scope['method'] != method:
+        return await send_response(send, 405, 'application/json', json_body({'error': 'Method not allowed'}))
+    await send_response(send, *handler(form_data(body)))
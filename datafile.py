@@ -0,0 +1,45 @@
+"""Compact JSON snapshot of the parsed timetable, so serving workers can
+start without pandas or openpyxl. Written by preprocess.py (and by the
+server after a parse when TIMETABLE_DATA is set)."""
+import json
+import os
+import tempfile
+
+FORMAT_VERSION = 1
+DEFAULT_PATH = 'timetable.json'
+
+# Columns the app serves, in display order
+COLUMNS = ['Day', 'Course Name', 'Class Time', 'Room No', 'Section', 'Batch', 'Type']
+
+def save_records(path, columns, records):
+    data = {
+        'format': FORMAT_VERSION,
+        'columns': columns,
+        'rows': [[record[column] for column in columns] for record in records],
+    }
+    # Write next to the target and rename, so readers never see half a file.
+    # The temporary name is unique, so concurrent writers never share it.
+    with tempfile.NamedTemporaryFile('w', dir=os.path.dirname(path) or '.', suffix='.tmp',
+                                     delete=False, encoding='utf-8') as f:
+        tmp_path = f.name
+        try:
+            json.dump(data, f, separators=(',', ':'), ensure_ascii=False)
+        except BaseException:
+            f.close()
+            os.remove(tmp_path)
+            raise
+    try:
+        # NamedTemporaryFile creates the file 0600; the data file is meant to be shared
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+def load_records(path):
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    if data.get('format') != FORMAT_VERSION:
+        raise ValueError(f"{path} has format {data.get('format')}, expected {FORMAT_VERSION}")
+    columns = data['columns']
+    return [dict(zip(columns, row)) for row in data['rows']]
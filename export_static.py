@@ -0,0 +1,142 @@
+"""Pre-render every dropdown combination so the page can be served as static files.
+
+    python export_static.py [output_dir] [--workers N] [--full]
+
+Writes manifest.json, index.html, and content-addressed JSON files under
+timetable/ and sections/. A rebuild reuses the previous manifest's entries
+for every day whose rows did not change.
+"""
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from flask import render_template
+
+import main
+
+TYPES = ['All', 'Class', 'Lab']
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()[:16]
+
+def dump(obj):
+    return json.dumps(obj, separators=(',', ':'), sort_keys=True).encode('utf-8')
+
+def combo_key(day, batch, section, class_type):
+    return '|'.join([day, batch, section, class_type])
+
+def filter_combinations(options, facets):
+    """Every Day x Batch x Section x Type the page can ask for. Sections are
+    limited to the ones /get_sections offers for the selected batch."""
+    combos = []
+    for batch in ['All'] + options['batches']:
+        sections = ['All'] + facets.values('section', {'batch': batch})
+        for day in ['All'] + options['days']:
+            for section in sections:
+                for class_type in TYPES:
+                    combos.append((day, batch, section, class_type))
+    return combos
+
+def day_hashes(snap):
+    rows = {}
+    for record in snap.records:
+        rows.setdefault(record['Day'], []).append(record)
+    return {day: content_hash(dump(day_rows)) for day, day_rows in rows.items()}
+
+def render_combo(combo):
+    return combo, dump(main.render_timetable(main.snapshot, *combo))
+
+def write_content(out_dir, folder, data):
+    name = f'{folder}/{content_hash(data)}.json'
+    path = os.path.join(out_dir, name)
+    if not os.path.exists(path):
+        with open(path, 'wb') as f:
+            f.write(data)
+    return name
+
+def load_previous(out_dir):
+    try:
+        with open(os.path.join(out_dir, 'manifest.json')) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if manifest.get('display_columns') != main.display_columns:
+        return None
+    return manifest
+
+def make_executor(workers):
+    # Rendering is CPU bound, so use processes where they can inherit the
+    # parsed snapshot instead of re-parsing the workbook
+    if 'fork' in multiprocessing.get_all_start_methods():
+        return ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('fork'))
+    return ThreadPoolExecutor(workers)
+
+def build(out_dir, workers=None, full=False):
+    snap = main.snapshot
+    options = snap.options
+    for folder in ('timetable', 'sections'):
+        os.makedirs(os.path.join(out_dir, folder), exist_ok=True)
+
+    hashes = day_hashes(snap)
+    previous = None if full else load_previous(out_dir)
+    reusable = {}
+    if previous:
+        old_hashes = previous.get('day_hashes', {})
+        unchanged_days = {day for day, value in hashes.items() if old_hashes.get(day) == value}
+        if unchanged_days == set(hashes) and set(old_hashes) == set(hashes):
+            unchanged_days.add('All')
+        for key, name in previous.get('timetable', {}).items():
+            if key.split('|', 1)[0] in unchanged_days and os.path.exists(os.path.join(out_dir, name)):
+                reusable[key] = name
+
+    timetable = {}
+    pending = []
+    for combo in filter_combinations(options, snap.facets):
+        key = combo_key(*combo)
+        if key in reusable:
+            timetable[key] = reusable[key]
+        else:
+            pending.append(combo)
+
+    with make_executor(workers or os.cpu_count()) as executor:
+        for combo, data in executor.map(render_combo, pending, chunksize=32):
+            timetable[combo_key(*combo)] = write_content(out_dir, 'timetable', data)
+
+    sections = {
+        batch: write_content(out_dir, 'sections', dump({'sections': snap.facets.values('section', {'batch': batch})}))
+        for batch in ['All'] + options['batches']
+    }
+
+    # Drop files that no combination points at any more
+    referenced = set(timetable.values()) | set(sections.values())
+    for folder in ('timetable', 'sections'):
+        for name in os.listdir(os.path.join(out_dir, folder)):
+            if f'{folder}/{name}' not in referenced:
+                os.remove(os.path.join(out_dir, folder, name))
+
+    manifest = {
+        'display_columns': main.display_columns,
+        'day_hashes': hashes,
+        'timetable': timetable,
+        'sections': sections,
+    }
+    with open(os.path.join(out_dir, 'manifest.json'), 'wb') as f:
+        f.write(dump(manifest))
+
+    with main.app.app_context():
+        html = render_template('index.html', static_build=True, **options)
+    with open(os.path.join(out_dir, 'index.html'), 'w', encoding='utf-8') as f:
+        f.write(html)
+
+    return {'combinations': len(timetable), 'rendered': len(pending), 'reused': len(timetable) - len(pending)}
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('output_dir', nargs='?', default='static_build')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--full', action='store_true', help='ignore the previous build and render everything')
+    args = parser.parse_args()
+    stats = build(args.output_dir, args.workers, args.full)
+    print(f"{stats['combinations']} combinations: {stats['rendered']} rendered, {stats['reused']} reused")
@@ -0,0 +1,232 @@
+"""CSV, XLSX and iCalendar exports of a filtered timetable.
+
+Each writer consumes rows a chunk at a time and writes straight to a file,
+so memory stays flat however many rows are exported. Finished files are
+kept on disk per snapshot version, up to MAX_CACHED_EXPORTS of them, and
+streamed back from there.
+"""
+import atexit
+from collections import OrderedDict
+import csv
+from datetime import date, datetime, timedelta, timezone
+import hashlib
+import io
+import os
+import shutil
+import tempfile
+import threading
+
+from timeslots import parse_class_time
+from schedule import DAY_ORDER
+from freetime import is_busy
+
+FORMATS = {
+    'csv': 'text/csv',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    'ics': 'text/calendar',
+}
+
+# Weekly events repeat this many times unless the request asks otherwise
+DEFAULT_WEEKS = 16
+
+def write_csv(path, columns, chunks):
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(columns)
+        for rows in chunks:
+            writer.writerows([['' if row[column] is None else row[column] for column in columns] for row in rows])
+
+def write_xlsx(path, columns, chunks):
+    # Only exports need openpyxl, so the serving process does not import it up front
+    from openpyxl import Workbook
+
+    # write_only streams rows to disk instead of keeping every cell in memory
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet('Timetable')
+    ws.append(columns)
+    for rows in chunks:
+        for row in rows:
+            ws.append([row[column] for column in columns])
+    wb.save(path)
+
+def ics_escape(text):
+    return (str(text).replace('\\', '\\\\').replace(';', '\\;')
+            .replace(',', '\\,').replace('\n', '\\n'))
+
+def ics_fold(line):
+    """Split a content line into 75-octet pieces as RFC 5545 asks"""
+    data = line.encode('utf-8')
+    if len(data) <= 75:
+        return line + '\r\n'
+    parts = []
+    while data:
+        limit = 75 if not parts else 74
+        cut = min(limit, len(data))
+        # Never split inside a multi-byte character
+        while cut < len(data) and (data[cut] & 0xC0) == 0x80:
+            cut -= 1
+        parts.append(data[:cut].decode('utf-8'))
+        data = data[cut:]
+    return '\r\n '.join(parts) + '\r\n'
+
+def first_date(start, day):
+    """First date on or after `start` that falls on `day`"""
+    return start + timedelta(days=(DAY_ORDER.index(day) - start.weekday()) % 7)
+
+def event_lines(row, start, weeks, stamp):
+    span = parse_class_time(row['Class Time'])
+    if not is_busy(row) or span is None or span[0] >= span[1] or row['Day'] not in DAY_ORDER:
+        return []
+    on = first_date(start, row['Day'])
+    begin = datetime(on.year, on.month, on.day, span[0] // 60, span[0] % 60)
+    end = datetime(on.year, on.month, on.day, span[1] // 60, span[1] % 60)
+    identity = '|'.join(str(row[column]) for column in ('Day', 'Class Time', 'Course Name', 'Section', 'Batch', 'Room No'))
+    summary = row['Course Name'] if not row['Section'] else f"{row['Course Name']} ({row['Section']})"
+    lines = [
+        'BEGIN:VEVENT',
+        f'UID:{hashlib.sha1(identity.encode("utf-8")).hexdigest()}@timetable',
+        f'DTSTAMP:{stamp}',
+        # Floating times: the class is at 10:00 wherever the calendar is
+        f'DTSTART:{begin:%Y%m%dT%H%M%S}',
+        f'DTEND:{end:%Y%m%dT%H%M%S}',
+        f'RRULE:FREQ=WEEKLY;COUNT={weeks}',
+        f'SUMMARY:{ics_escape(summary)}',
+    ]
+    if row['Room No']:
+        lines.append(f"LOCATION:{ics_escape(row['Room No'])}")
+    details = [f'{column}: {row[column]}' for column in ('Batch', 'Type') if row[column]]
+    if details:
+        lines.append(f"DESCRIPTION:{ics_escape(chr(10).join(details))}")
+    lines.append('END:VEVENT')
+    return lines
+
+def write_ics(path, chunks, start, weeks):
+    """One weekly recurring event per meeting, starting the week of `start`"""
+    stamp = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        for line in ['BEGIN:VCALENDAR', 'VERSION:2.0', 'PRODID:-//Timetable//Export//EN', 'CALSCALE:GREGORIAN']:
+            f.write(ics_fold(line))
+        for rows in chunks:
+            f.write(''.join(ics_fold(line) for row in rows for line in event_lines(row, start, weeks, stamp)))
+        f.write(ics_fold('END:VCALENDAR'))
+
+def parse_start(value):
+    """YYYY-MM-DD, or the Monday of the current week"""
+    if value:
+        return date.fromisoformat(value)
+    today = date.today()
+    return today - timedelta(days=today.weekday())
+
+# Most exports kept on disk at once; the least recently used go first
+MAX_CACHED_EXPORTS = 64
+
+class _Entry:
+    def __init__(self, path):
+        self.path = path
+        self.ready = threading.Event()
+        self.error = None
+        # Requests waiting for or reading the file; it is only deleted at 0
+        self.users = 0
+        self.evicted = False
+
+class ExportFile(io.FileIO):
+    """Read handle on a cached export that lets the cache delete the file
+    once the last reader closes it"""
+
+    def __init__(self, entry):
+        super().__init__(entry.path, 'rb')
+        self.entry = entry
+
+    def close(self):
+        if not self.closed:
+            super().close()
+            _release(self.entry)
+
+_cache_lock = threading.Lock()
+_cache_dir = None
+_cache_version = None
+_cache = OrderedDict()
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+def _evict(key):
+    # Called with _cache_lock held
+    entry = _cache.pop(key)
+    entry.evicted = True
+    if entry.users == 0:
+        _remove(entry.path)
+
+def _release(entry):
+    with _cache_lock:
+        entry.users -= 1
+        if entry.users == 0 and entry.evicted:
+            _remove(entry.path)
+
+def open_export(version, key, fmt, write):
+    """Open the export for `key`, calling write(path) if it is not cached.
+    Concurrent requests for the same export share one write. Exports of
+    older snapshot versions, and the least recently used ones past
+    MAX_CACHED_EXPORTS, are deleted as soon as nobody is reading them."""
+    global _cache_dir, _cache_version
+    cache_key = (version, key, fmt)
+    with _cache_lock:
+        if _cache_dir is None:
+            _cache_dir = tempfile.mkdtemp(prefix='timetable-exports-')
+        if _cache_version is None or version > _cache_version:
+            _cache_version = version
+            for old_key in [old_key for old_key in _cache if old_key[0] < version]:
+                _evict(old_key)
+        entry = _cache.get(cache_key)
+        leader = entry is None
+        if leader:
+            name = hashlib.sha256(repr(cache_key).encode('utf-8')).hexdigest()[:16]
+            entry = _Entry(os.path.join(_cache_dir, f'{version}-{name}.{fmt}'))
+            if version == _cache_version:
+                _cache[cache_key] = entry
+                while len(_cache) > MAX_CACHED_EXPORTS:
+                    _evict(next(iter(_cache)))
+            else:
+                # A request that started before a reload: serve it, keep nothing
+                entry.evicted = True
+        else:
+            _cache.move_to_end(cache_key)
+        entry.users += 1
+
+    if leader:
+        # Write under a temporary name and rename, so a half-written file is never served
+        tmp_path = f'{entry.path}.tmp'
+        try:
+            write(tmp_path)
+            os.replace(tmp_path, entry.path)
+        except Exception as e:
+            entry.error = e
+            _remove(tmp_path)
+            with _cache_lock:
+                if _cache.get(cache_key) is entry:
+                    del _cache[cache_key]
+        finally:
+            entry.ready.set()
+
+    entry.ready.wait()
+    if entry.error is not None:
+        _release(entry)
+        raise entry.error
+    try:
+        return ExportFile(entry)
+    except OSError:
+        _release(entry)
+        raise
+
+@atexit.register
+def clear_cache():
+    global _cache_dir, _cache_version
+    with _cache_lock:
+        if _cache_dir is not None:
+            shutil.rmtree(_cache_dir, ignore_errors=True)
+        _cache_dir = None
+        _cache_version = None
+        _cache.clear()
@@ -0,0 +1,63 @@
+# Form field -> timetable column for every dropdown
+FACET_COLUMNS = {
+    'day': 'Day',
+    'batch': 'Batch',
+    'section': 'Section',
+    'class_type': 'Type',
+}
+
+def build_bitmap(positions):
+    bits = bytearray((max(positions) >> 3) + 1)
+    for position in positions:
+        bits[position >> 3] |= 1 << (position & 7)
+    return int.from_bytes(bits, 'little')
+
+def bit_positions(mask):
+    """Indexes of the set bits, lowest first"""
+    return [i for i, bit in enumerate(bin(mask)[:1:-1]) if bit == '1']
+
+class FacetIndex:
+    """One bitset per distinct Day, Batch, Section and Type value, with
+    bit i standing for row i of the snapshot. Counts for a selection are
+    ANDs and popcounts over these bitsets."""
+
+    def __init__(self, records):
+        self.all_rows = (1 << len(records)) - 1
+        positions = {field: {} for field in FACET_COLUMNS}
+        for i, record in enumerate(records):
+            for field, column in FACET_COLUMNS.items():
+                value = record[column]
+                if value is not None:
+                    positions[field].setdefault(value, []).append(i)
+        self.bitmaps = {
+            field: {value: build_bitmap(rows) for value, rows in sorted(values.items(), key=lambda item: str(item[0]))}
+            for field, values in positions.items()
+        }
+
+    def mask(self, selection, skip=None):
+        mask = self.all_rows
+        for field in FACET_COLUMNS:
+            value = selection.get(field)
+            if field == skip or not value or value == 'All':
+                continue
+            mask &= self.bitmaps[field].get(value, 0)
+        return mask
+
+    def values(self, field, selection):
+        """Values of `field` that still have rows under the other selections"""
+        others = self.mask(selection, skip=field)
+        return [value for value, bitmap in self.bitmaps[field].items() if bitmap & others]
+
+    def facets(self, selection):
+        """For every dropdown, the options that give results under the rest
+        of the selection and how many rows each one would show."""
+        result = {}
+        for field in FACET_COLUMNS:
+            others = self.mask(selection, skip=field)
+            options = []
+            for value, bitmap in self.bitmaps[field].items():
+                count = (bitmap & others).bit_count()
+                if count:
+                    options.append({'value': value, 'count': count})
+            result[field] = {'options': options, 'total': others.bit_count()}
+        return {'facets': result, 'count': self.mask(selection).bit_count()}
@@ -0,0 +1,162 @@
+from collections import Counter
+
+from timeslots import parse_class_time, parse_clock_time, format_minutes
+from schedule import DAY_ORDER
+
+# Make-up classes have to fit inside normal campus hours unless asked otherwise
+DEFAULT_FROM = 8 * 60 + 30
+DEFAULT_TO = 17 * 60 + 15
+
+def span_mask(start, end):
+    """Bitset with one bit per minute in [start, end)"""
+    if end <= start:
+        return 0
+    return ((1 << (end - start)) - 1) << start
+
+def run_starts(mask, length):
+    """Bits i where mask has `length` consecutive set bits starting at i"""
+    covered = 1
+    while covered < length:
+        step = min(covered, length - covered)
+        mask &= mask >> step
+        covered += step
+    return mask
+
+def runs(mask):
+    """Yield (start, end) for each maximal run of set bits"""
+    while mask:
+        start = (mask & -mask).bit_length() - 1
+        shifted = mask >> start
+        length = (shifted ^ (shifted + 1)).bit_length() - 1
+        yield start, start + length
+        mask &= ~span_mask(start, start + length)
+
+def is_busy(record):
+    course = record['Course Name']
+    return bool(course) and not str(course).startswith('Free Slot')
+
+class FreeTimeIndex:
+    """Per-day minute bitsets for every section and room, built once per
+    snapshot. A query ORs the busy masks of the requested sections and
+    ANDs the result against each room's free mask."""
+
+    def __init__(self, records):
+        self.days = []
+        self.section_busy = {}
+        self.room_busy = {}
+        self.known_sections = set()
+        room_types = {}
+        for record in records:
+            day = record['Day']
+            if day not in self.days:
+                self.days.append(day)
+            room = record['Room No']
+            if room is not None:
+                room_types.setdefault(room, Counter())[record['Type']] += 1
+                self.room_busy.setdefault((day, room), 0)
+            if not is_busy(record):
+                continue
+            span = parse_class_time(record['Class Time'])
+            if span is None:
+                continue
+            mask = span_mask(*span)
+            if room is not None:
+                self.room_busy[(day, room)] |= mask
+            section = record['Section']
+            if section:
+                self.known_sections.update([(section, None), (section, record['Batch'])])
+                key = (day, section, None)
+                self.section_busy[key] = self.section_busy.get(key, 0) | mask
+                key = (day, section, record['Batch'])
+                self.section_busy[key] = self.section_busy.get(key, 0) | mask
+        self.days.sort(key=lambda d: DAY_ORDER.index(d) if d in DAY_ORDER else len(DAY_ORDER))
+
+        # A room is a Lab or a Class room depending on what it mostly hosts
+        self.room_type = {room: counts.most_common(1)[0][0] for room, counts in room_types.items()}
+
+        # Rooms with identical busy masks only need to be checked once
+        self.room_groups = {}
+        for (day, room), mask in self.room_busy.items():
+            groups = self.room_groups.setdefault((day, self.room_type[room]), {})
+            groups.setdefault(mask, []).append(room)
+
+    def free_rooms(self, day, start, end):
+        """Rooms on a day's sheet with nothing scheduled in [start, end)"""
+        slot = span_mask(start, end)
+        return sorted(room for (room_day, room), busy in self.room_busy.items()
+                      if room_day == day and not busy & slot)
+
+    def batches_for(self, section):
+        """Batches that have this section code"""
+        return sorted({batch for known, batch in self.known_sections if known == section and batch is not None}, key=str)
+
+    def unknown_sections(self, sections):
+        """(section, batch) pairs with no classes on any day, usually typos.
+        sections_busy would treat them as free all day."""
+        return [(section, batch) for section, batch in sections
+                if (section, batch or None) not in self.known_sections]
+
+    def sections_busy(self, day, sections):
+        busy = 0
+        for section, batch in sections:
+            busy |= self.section_busy.get((day, section, batch or None), 0)
+        return busy
+
+    def free_groups(self, day, sections, room_type, window):
+        """Yield (free mask, rooms) for rooms of the given type on a day"""
+        free = window & ~self.sections_busy(day, sections)
+        types = ['Class', 'Lab'] if room_type in (None, 'Any', 'All') else [room_type]
+        for kind in types:
+            for busy, rooms in self.room_groups.get((day, kind), {}).items():
+                yield free & ~busy, rooms
+
+    def query(self, sections, minutes, days=None, room_type=None,
+              start=DEFAULT_FROM, end=DEFAULT_TO, earliest=True):
+        """Find windows of at least `minutes` when every section is free and
+        a room of `room_type` is empty. `sections` is a list of
+        (section, batch) pairs, batch may be None."""
+        window = span_mask(start, end)
+        days = [day for day in self.days if not days or day in days]
+
+        if earliest:
+            for day in days:
+                best = None
+                best_rooms = []
+                for free, rooms in self.free_groups(day, sections, room_type, window):
+                    starts = run_starts(free, minutes)
+                    if not starts:
+                        continue
+                    first = (starts & -starts).bit_length() - 1
+                    if best is None or first < best:
+                        best, best_rooms = first, list(rooms)
+                    elif first == best:
+                        best_rooms.extend(rooms)
+                if best is not None:
+                    return [{
+                        'day': day,
+                        'start': format_minutes(best),
+                        'end': format_minutes(best + minutes),
+                        'rooms': sorted(best_rooms),
+                    }]
+            return []
+
+        windows = []
+        for day in days:
+            by_window = {}
+            for free, rooms in self.free_groups(day, sections, room_type, window):
+                for run_start, run_end in runs(free):
+                    if run_end - run_start >= minutes:
+                        by_window.setdefault((run_start, run_end), []).extend(rooms)
+            for (run_start, run_end), rooms in sorted(by_window.items()):
+                windows.append({
+                    'day': day,
+                    'start': format_minutes(run_start),
+                    'end': format_minutes(run_end),
+                    'rooms': sorted(rooms),
+                })
+        return windows
+
+def parse_window_time(value, default):
+    if not value:
+        return default
+    return parse_clock_time(value)
@@ -0,0 +1,90 @@
+from bisect import bisect_right
+
+from timeslots import parse_class_time
+from schedule import DAY_ORDER, Event, event_to_dict
+from freetime import is_busy
+
+# Width of a bucket in the "what is running now" index
+BUCKET_MINUTES = 5
+
+def timeline_keys(event):
+    """Timelines an event belongs to. None is the whole campus, and sections
+    are indexed with and without their batch since codes repeat across intakes."""
+    keys = [None]
+    if event.room is not None:
+        keys.append(('room', event.room))
+    if event.section:
+        keys.append(('section', event.section, None))
+        keys.append(('section', event.section, event.batch))
+    return keys
+
+def timeline_key(room=None, section=None, batch=None):
+    if room:
+        return ('room', room)
+    if section:
+        return ('section', section, batch or None)
+    return None
+
+class LiveIndex:
+    """Current and next meetings for every room and section. Running events
+    are bucketed by (timeline, day, minute // BUCKET_MINUTES); upcoming ones
+    come from a bisect over each timeline's sorted start times. Times come
+    from timeslots.parse_class_time, so the pre-08:30-is-PM rule matches
+    every other index."""
+
+    def __init__(self, records):
+        self.active = {}
+        self.timelines = {}
+        for record in records:
+            if not is_busy(record):
+                continue
+            span = parse_class_time(record['Class Time'])
+            if span is None or span[0] >= span[1]:
+                continue
+            event = Event(
+                record['Day'], span[0], span[1], record['Course Name'], record['Section'],
+                record['Room No'], record['Batch'], record['Type'], record['Class Time'],
+            )
+            for key in timeline_keys(event):
+                for bucket in range(event.start // BUCKET_MINUTES, (event.end - 1) // BUCKET_MINUTES + 1):
+                    self.active.setdefault((key, event.day, bucket), []).append(event)
+                self.timelines.setdefault(key, {}).setdefault(event.day, []).append(event)
+
+        # Per timeline and day: events in start order and their start minutes
+        self.starts = {}
+        for key, days in self.timelines.items():
+            for day, events in days.items():
+                events.sort(key=lambda e: (e.start, e.end, str(e.course)))
+                self.starts[(key, day)] = [event.start for event in events]
+
+    def has(self, key):
+        return key in self.timelines
+
+    def current(self, key, day, minute):
+        bucket = self.active.get((key, day, minute // BUCKET_MINUTES), [])
+        return [event for event in bucket if event.start <= minute < event.end]
+
+    def upcoming(self, key, day, minute):
+        """Events sharing the first start time after `minute`, looking ahead
+        through the rest of the week if nothing else happens on `day`"""
+        days = self.timelines.get(key, {})
+        offset = DAY_ORDER.index(day) if day in DAY_ORDER else 0
+        for step in range(len(DAY_ORDER) + 1):
+            next_day = DAY_ORDER[(offset + step) % len(DAY_ORDER)]
+            events = days.get(next_day)
+            if not events:
+                continue
+            # Later the same day on the first pass, anything from the start
+            # of the day after that (a full week round lands back on `day`)
+            i = bisect_right(self.starts[(key, next_day)], minute) if step == 0 else 0
+            if i < len(events):
+                first = events[i].start
+                return [event for event in events[i:] if event.start == first]
+        return []
+
+    def now(self, day, minute, room=None, section=None, batch=None):
+        key = timeline_key(room, section, batch)
+        return {
+            'current': [event_to_dict(event) for event in self.current(key, day, minute)],
+            'next': [event_to_dict(event) for event in self.upcoming(key, day, minute)],
+        }
@@ -0,0 +1,409 @@
+"""Replay a realistic request mix against a locally started app.
+
+    python loadtest.py --stages 1,8,32 --duration 20 --output results.json
+    python loadtest.py --server "gunicorn -w 2 --threads 8 -b 127.0.0.1:{port} main:app"
+    python loadtest.py --mode async --clients asyncio --stages 1000 --think 1
+
+Starts the server (flask's threaded dev server, or uvicorn serving asgi.py
+with --mode async, unless --server is given), waits for it to answer, then
+runs each concurrency stage in turn and reports throughput and p50/p95/p99
+latency per route. Each simulated client keeps one keep-alive connection
+open and waits --think seconds between requests.
+"""
+import argparse
+import asyncio
+from html.parser import HTMLParser
+import http.client
+import json
+import math
+import random
+import shlex
+import socket
+import subprocess
+import sys
+import threading
+import time
+from urllib.parse import urlencode
+
+# Share of requests per route when a student uses the page
+DEFAULT_MIX = {
+    'index': 5,
+    'get_sections': 15,
+    'get_filtered_timetable': 65,
+    'get_free_rooms': 15,
+}
+
+# Server started for each --mode when no --server command is given
+SERVERS = {
+    'sync': [sys.executable, '-m', 'flask', '--app', 'main', 'run',
+             '--host', '127.0.0.1', '--port', '{port}', '--with-threads'],
+    'async': [sys.executable, '-m', 'uvicorn', 'asgi:app',
+              '--host', '127.0.0.1', '--port', '{port}', '--log-level', 'warning'],
+}
+
+FREE_ROOM_SLOTS = ['08:30-09:50', '10:00-11:20', '11:30-12:50', '01:00-02:20', '02:30-03:50', '03:55-05:15']
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    # Nearest-rank percentile
+    index = max(0, math.ceil(fraction * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+def latency_summary(sorted_values):
+    return {
+        f'p{int(fraction * 100)}_ms': percentile(sorted_values, fraction) * 1000 if sorted_values else None
+        for fraction in (0.50, 0.95, 0.99)
+    }
+
+def start_server(command, port, timeout, mode='sync'):
+    if command:
+        args = shlex.split(command.format(port=port))
+    else:
+        args = [arg.format(port=port) for arg in SERVERS[mode]]
+    process = subprocess.Popen(args, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f'server exited with code {process.returncode}: {" ".join(args)}')
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+            conn.request('GET', '/')
+            if conn.getresponse().status == 200:
+                conn.close()
+                return process
+        except OSError:
+            time.sleep(0.5)
+    process.kill()
+    raise RuntimeError(f'server did not answer on port {port} within {timeout}s')
+
+# Dropdown ids on the index page, for revisions without /get_facets
+SELECT_FIELDS = {'day-select': 'day', 'batch-select': 'batch', 'section-select': 'section'}
+
+class OptionParser(HTMLParser):
+    """Collects the <option> values of the page's filter dropdowns"""
+
+    def __init__(self):
+        super().__init__()
+        self.values = {field: [] for field in SELECT_FIELDS.values()}
+        self.field = None
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == 'select':
+            self.field = SELECT_FIELDS.get(attrs.get('id'))
+        elif tag == 'option' and self.field and attrs.get('value') not in (None, 'All'):
+            self.values[self.field].append(attrs['value'])
+
+    def handle_endtag(self, tag):
+        if tag == 'select':
+            self.field = None
+
+def fetch_values(host, port):
+    """Real dropdown values, taken from the app's facet endpoint, or from
+    the index page on revisions that predate /get_facets"""
+    conn = http.client.HTTPConnection(host, port, timeout=30)
+    conn.request('POST', '/get_facets', body='', headers={'Content-Type': 'application/x-www-form-urlencoded'})
+    response = conn.getresponse()
+    body = response.read()
+    if response.status != 404:
+        conn.close()
+        facets = json.loads(body)['facets']
+        return {field: [option['value'] for option in facet['options']] for field, facet in facets.items()}
+
+    conn.request('GET', '/')
+    page = conn.getresponse().read().decode('utf-8')
+    conn.close()
+    parser = OptionParser()
+    parser.feed(page)
+    return parser.values
+
+class RequestMix:
+    """Turns route names into concrete requests with values taken from the
+    live timetable, so filters hit real days, batches and sections."""
+
+    def __init__(self, values, weights, seed):
+        self.values = values
+        self.weights = weights
+        self.random = random.Random(seed)
+
+    def pick(self, field):
+        # Students leave a dropdown on 'All' about a third of the time
+        if self.random.random() < 0.3:
+            return 'All'
+        return self.random.choice(self.values[field])
+
+    def next(self):
+        route = self.random.choices(list(self.weights), list(self.weights.values()))[0]
+        if route == 'index':
+            return route, 'GET', '/', None
+        if route == 'get_sections':
+            return route, 'POST', '/get_sections', {'batch': self.pick('batch')}
+        if route == 'get_free_rooms':
+            return route, 'POST', '/get_free_rooms', {
+                'day': self.random.choice(self.values['day']),
+                'time_slot': self.random.choice(FREE_ROOM_SLOTS),
+            }
+        return route, 'POST', '/get_filtered_timetable', {
+            'day': self.pick('day'),
+            'batch': self.pick('batch'),
+            'section': self.pick('section'),
+        }
+
+def stage_result(concurrency, elapsed, latencies, errors):
+    routes = {}
+    for route in sorted(set(latencies) | set(errors)):
+        values = sorted(latencies.get(route, []))
+        routes[route] = {
+            'requests': len(values),
+            'errors': errors.get(route, 0),
+            'throughput': len(values) / elapsed,
+            **latency_summary(values),
+        }
+    all_values = sorted(value for values in latencies.values() for value in values)
+    return {
+        'concurrency': concurrency,
+        'seconds': elapsed,
+        'requests': len(all_values),
+        'errors': sum(errors.values()),
+        'throughput': len(all_values) / elapsed,
+        **latency_summary(all_values),
+        'routes': routes,
+    }
+
+def drop_missing_routes(host, port, mix):
+    """Remove routes this revision does not serve (404) from the mix"""
+    probe = RequestMix(mix.values, mix.weights, 0)
+    conn = http.client.HTTPConnection(host, port, timeout=30)
+    for route in list(mix.weights):
+        probe.weights = {route: 1}
+        _, method, path, form = probe.next()
+        body = urlencode(form) if form is not None else None
+        headers = {'Content-Type': 'application/x-www-form-urlencoded'} if form is not None else {}
+        conn.request(method, path, body=body, headers=headers)
+        response = conn.getresponse()
+        response.read()
+        if response.status == 404:
+            print(f'skipping {route}: {path} is not served by this revision')
+            del mix.weights[route]
+    conn.close()
+
+def run_stage(host, port, mix, concurrency, duration, think=0):
+    latencies = {}
+    errors = {}
+    lock = threading.Lock()
+    stop_at = time.perf_counter() + duration
+
+    def worker(seed):
+        local_mix = RequestMix(mix.values, mix.weights, seed)
+        conn = http.client.HTTPConnection(host, port, timeout=30)
+        local_latencies = {}
+        local_errors = {}
+        while time.perf_counter() < stop_at:
+            route, method, path, form = local_mix.next()
+            body = urlencode(form) if form is not None else None
+            headers = {'Content-Type': 'application/x-www-form-urlencoded'} if form is not None else {}
+            started = time.perf_counter()
+            try:
+                conn.request(method, path, body=body, headers=headers)
+                response = conn.getresponse()
+                response.read()
+                ok = response.status == 200
+            except (OSError, http.client.HTTPException):
+                conn.close()
+                conn = http.client.HTTPConnection(host, port, timeout=30)
+                ok = False
+            elapsed = time.perf_counter() - started
+            if ok:
+                local_latencies.setdefault(route, []).append(elapsed)
+            else:
+                local_errors[route] = local_errors.get(route, 0) + 1
+            if think:
+                time.sleep(think)
+        conn.close()
+        with lock:
+            for route, values in local_latencies.items():
+                latencies.setdefault(route, []).extend(values)
+            for route, count in local_errors.items():
+                errors[route] = errors.get(route, 0) + count
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(mix.random.random(),)) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    return stage_result(concurrency, elapsed, latencies, errors)
+
+async def http_request(reader, writer, host, method, path, form):
+    """One request on an open HTTP/1.1 connection. Returns (status, keep_alive)."""
+    body = urlencode(form).encode('utf-8') if form is not None else b''
+    head = f'{method} {path} HTTP/1.1\r\nHost: {host}\r\nContent-Length: {len(body)}\r\n'
+    if form is not None:
+        head += 'Content-Type: application/x-www-form-urlencoded\r\n'
+    writer.write(head.encode('latin-1') + b'\r\n' + body)
+    await writer.drain()
+
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError('server closed the connection')
+    status = int(status_line.split()[1])
+    length = None
+    keep_alive = True
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        name = name.strip().lower()
+        if name == 'content-length':
+            length = int(value)
+        elif name == 'connection' and value.strip().lower() == 'close':
+            keep_alive = False
+    if length is None:
+        await reader.read()
+        keep_alive = False
+    else:
+        await reader.readexactly(length)
+    return status, keep_alive
+
+def run_stage_async(host, port, mix, concurrency, duration, think=0):
+    """Same as run_stage, but every client is a coroutine on one event loop,
+    so a thousand keep-alive clients do not need a thousand threads."""
+    latencies = {}
+    errors = {}
+
+    async def client(seed, stop_at):
+        local_mix = RequestMix(mix.values, mix.weights, seed)
+        # Spread the first connections out instead of opening them all at once
+        await asyncio.sleep(local_mix.random.random() * (think or 0.1))
+        reader = writer = None
+        while time.perf_counter() < stop_at:
+            route, method, path, form = local_mix.next()
+            started = time.perf_counter()
+            try:
+                if writer is None:
+                    reader, writer = await asyncio.open_connection(host, port)
+                status, keep_alive = await asyncio.wait_for(
+                    http_request(reader, writer, host, method, path, form), 30)
+                ok = status == 200
+            except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError, IndexError):
+                ok = False
+                keep_alive = False
+            elapsed = time.perf_counter() - started
+            if not keep_alive and writer is not None:
+                writer.close()
+                reader = writer = None
+            if ok:
+                latencies.setdefault(route, []).append(elapsed)
+            else:
+                errors[route] = errors.get(route, 0) + 1
+            if think:
+                await asyncio.sleep(think)
+        if writer is not None:
+            writer.close()
+
+    async def run():
+        stop_at = time.perf_counter() + duration
+        await asyncio.gather(*(client(mix.random.random(), stop_at) for _ in range(concurrency)))
+
+    started = time.perf_counter()
+    asyncio.run(run())
+    elapsed = time.perf_counter() - started
+    return stage_result(concurrency, elapsed, latencies, errors)
+
+def format_ms(value):
+    return '-' if value is None else f'{value:.1f}'
+
+def print_stage(stage):
+    print(f"\nconcurrency {stage['concurrency']}: {stage['throughput']:.1f} req/s, "
+          f"{stage['requests']} ok, {stage['errors']} errors")
+    print(f"  {'route':<26}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'errors':>8}")
+    for route, stats in stage['routes'].items():
+        print(f"  {route:<26}{stats['throughput']:>9.1f}{format_ms(stats['p50_ms']):>9}"
+              f"{format_ms(stats['p95_ms']):>9}{format_ms(stats['p99_ms']):>9}{stats['errors']:>8}")
+
+def git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def parse_mix(text):
+    weights = dict(DEFAULT_MIX)
+    if text:
+        weights = {}
+        for part in text.split(','):
+            route, weight = part.split('=')
+            weights[route.strip()] = float(weight)
+    unknown = set(weights) - set(DEFAULT_MIX)
+    if unknown:
+        raise SystemExit(f'unknown routes in --mix: {", ".join(sorted(unknown))}')
+    return weights
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--server', help='command that starts the app, {port} is replaced with the port')
+    parser.add_argument('--mode', choices=sorted(SERVERS), default='sync',
+                        help='serve main.py with flask (sync) or asgi.py with uvicorn (async) when --server is not given')
+    parser.add_argument('--clients', choices=['threads', 'asyncio'], default='threads',
+                        help='one thread per simulated client, or coroutines on one event loop')
+    parser.add_argument('--think', type=float, default=0, help='seconds each client idles between requests')
+    parser.add_argument('--port', type=int, default=None, help='talk to an app already running on this local port')
+    parser.add_argument('--stages', default='1,4,16,32', help='comma separated concurrency levels')
+    parser.add_argument('--duration', type=float, default=15, help='seconds per stage')
+    parser.add_argument('--warmup', type=float, default=3, help='seconds of traffic before the first stage')
+    parser.add_argument('--mix', help='route weights, e.g. get_filtered_timetable=70,get_sections=30')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--startup-timeout', type=float, default=180)
+    parser.add_argument('--label', help='name for this run in the results file')
+    parser.add_argument('--output', help='write results as JSON to this file')
+    args = parser.parse_args()
+
+    host = '127.0.0.1'
+    process = None
+    port = args.port
+    if port is None:
+        port = free_port()
+        print(f'starting server on port {port}...')
+        process = start_server(args.server, port, args.startup_timeout, args.mode)
+
+    stage_runner = run_stage_async if args.clients == 'asyncio' else run_stage
+    try:
+        mix = RequestMix(fetch_values(host, port), parse_mix(args.mix), args.seed)
+        drop_missing_routes(host, port, mix)
+        if args.warmup:
+            run_stage(host, port, mix, 1, args.warmup)
+        stages = []
+        for concurrency in (int(value) for value in args.stages.split(',')):
+            stage = stage_runner(host, port, mix, concurrency, args.duration, args.think)
+            print_stage(stage)
+            stages.append(stage)
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({
+                'label': args.label,
+                'revision': git_revision(),
+                'server': args.server or ' '.join(SERVERS[args.mode][1:]),
+                'clients': args.clients,
+                'think': args.think,
+                'mix': mix.weights,
+                'duration': args.duration,
+                'started': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'stages': stages,
+            }, f, indent=2)
+        print(f'\nresults written to {args.output}')
+
+if __name__ == '__main__':
+    main()
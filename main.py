@@ -1,114 +1,225 @@
-from flask import Flask, render_template, request, jsonify
-import pandas as pd
+from flask import Flask, Response, g, render_template, request, jsonify, send_file, stream_with_context
 from datetime import datetime
-from TimeTable import get_time_table  # Import your existing script
+from html import escape
+from zoneinfo import ZoneInfo
+from singleflight import SingleFlight
+import datafile
+import exports
+import parser_compare
+import profiling
+from timeslots import parse_class_time, parse_clock_time, format_minutes
+from schedule import DAY_ORDER, ScheduleIndex
+from live import LiveIndex, timeline_key
+from search import CourseSearchIndex
+from facets import FacetIndex, FACET_COLUMNS, bit_positions
+from freetime import FreeTimeIndex, DEFAULT_FROM, DEFAULT_TO, parse_window_time
+import json
+import os
 import re
+import threading
+import time
 
 app = Flask(__name__)
 
-# Load and preprocess the timetable data
-def preprocess_timetable():
-    df = get_time_table()
-    
-    # 1. Separate theory and lab classes
-    df['Type'] = df.apply(lambda row: 'Lab' if 'Lab' in str(row['Course Name']) else row['Type'], axis=1)
-    
-    # Replace this section normalization:
-# df['Section'] = df['Section'].apply(lambda x: x.split('-')[0] + '-' + x.split('-')[1][0] 
-#                                   if x and '-' in str(x) and len(str(x).split('-')[1]) > 1 else x)
-
-    # With this version that preserves A1, A2, etc. patterns:
-    def normalize_section(section):
-        if not section or pd.isna(section):
-            return section
-        section = str(section)
-        # If section matches pattern like AI-A1, AI-B2, etc., keep as is
-        if re.match(r'^[A-Z]{2,3}-[A-Z]\d+$', section):
-            return section
-        # Otherwise normalize other section formats
-        if '-' in section and len(section.split('-')[1]) > 1:
-            return section.split('-')[0] + '-' + section.split('-')[1][0]
-        return section
-
-    df['Section'] = df['Section'].apply(normalize_section)
-    
-    # 3. Convert times to proper datetime for sorting
-    def get_start_time(time_str):
-        if pd.isna(time_str):
-            return pd.to_datetime('23:59', format='%H:%M')  # Put invalid times at end
-        
+# Concurrent identical requests wait on one computation instead of repeating it
+render_flight = SingleFlight()
+free_rooms_flight = SingleFlight()
+reload_flight = SingleFlight()
+
+display_columns = datafile.COLUMNS
+
+# With TIMETABLE_DATA set, workers start from this prebuilt data file and
+# never import pandas or openpyxl unless asked to re-parse the workbook
+DATA_PATH = os.environ.get('TIMETABLE_DATA')
+
+# Campus timezone for /now, whatever timezone the server runs in
+CAMPUS_TZ = ZoneInfo(os.environ.get('TIMETABLE_TZ', 'Asia/Karachi'))
+
+# Rows are serialized this many at a time, which bounds per-request memory
+ROW_CHUNK = 200
+MAX_PAGE_SIZE = 1000
+
+def dropdown_options(facets):
+    # Unique days, batches, and sections for the dropdowns, already sorted
+    return {
+        'days': list(facets.bitmaps['day']),
+        'batches': list(facets.bitmaps['batch']),
+        'sections': list(facets.bitmaps['section']),
+    }
+
+class Snapshot:
+    """One parsed workbook. Reloads build a new Snapshot and swap it in whole,
+    so a request always sees a consistent table."""
+
+    def __init__(self, records, version):
+        # Plain dict rows in StartTime order, see preprocess.records_from_frame
+        self.records = records
+        self.version = version
+        self.schedule = ScheduleIndex(records)
+        self.free_time = FreeTimeIndex(records)
+        self.search = CourseSearchIndex(records)
+        self.facets = FacetIndex(records)
+        self.live = LiveIndex(records)
+        self.options = dropdown_options(self.facets)
+
+snapshot = None
+
+# module:function of a parser to run next to get_time_table on every load,
+# e.g. SHADOW_PARSER=fast_parser:get_time_table. It never affects serving.
+SHADOW_PARSER = os.environ.get('SHADOW_PARSER')
+shadow_report = None
+
+def start_shadow_comparison(raw_df, parse_seconds):
+    def run():
+        global shadow_report
         try:
-            start_time = time_str.split('-')[0].strip()
-            
-            # Parse the time
-            time_obj = pd.to_datetime(start_time, format='%H:%M')
-            hour = time_obj.hour
-            minute = time_obj.minute
-            
-            # Since classes run from 8:30 AM to 5:15 PM (17:15)
-            # Any time before 8:30 should be interpreted as PM (add 12 hours)
-            if hour < 8 or (hour == 8 and minute < 30):
-                # This is PM time, convert to 24-hour format
-                if hour != 12:  # Don't add 12 to 12 PM
-                    hour += 12
-                time_obj = pd.to_datetime(f'{hour:02d}:{minute:02d}', format='%H:%M')
-            
-            return time_obj
-            
+            report = parser_compare.run_shadow(SHADOW_PARSER, raw_df, parse_seconds)
         except Exception as e:
-            print(f"Error parsing time '{time_str}': {e}")
-            return pd.to_datetime('23:59', format='%H:%M')  # Put invalid times at end
+            print(f"Shadow parser {SHADOW_PARSER} failed: {e}")
+            shadow_report = {'shadow_parser': SHADOW_PARSER, 'error': str(e)}
+            return
+        print(f"Shadow parser {SHADOW_PARSER}:")
+        print('\n'.join(parser_compare.summary_lines(report, limit=5)))
+        shadow_report = report
+    threading.Thread(target=run, daemon=True).start()
+
+def load_snapshot(from_file=False):
+    global snapshot
+    version = snapshot.version + 1 if snapshot else 1
+    if from_file:
+        records = datafile.load_records(DATA_PATH)
+    else:
+        # pandas and openpyxl are only needed to parse the workbook
+        from preprocess import parse_timetable
+        with profiling.profiled('get_time_table', profiling.PROFILE_LOAD):
+            raw_df, parse_seconds, records = parse_timetable(display_columns)
+        if SHADOW_PARSER:
+            start_shadow_comparison(raw_df, parse_seconds)
+        if DATA_PATH:
+            datafile.save_records(DATA_PATH, display_columns, records)
+    snapshot = Snapshot(records, version)
+    return snapshot
+
+def reload_timetable():
+    # The running parse may have read the workbook before it was replaced,
+    # so a reload waits for it and then parses again. Reloads that arrive
+    # while that next parse is queued share it.
+    return reload_flight.do_fresh('reload', load_snapshot)
+
+if DATA_PATH and os.path.exists(DATA_PATH):
+    reload_flight.do('reload', load_snapshot, True)
+else:
+    reload_timetable()
+
+def filter_positions(snap, day, batch, section, class_type):
+    """Positions of matching records, in StartTime order"""
+    return bit_positions(snap.facets.mask({
+        'day': day,
+        'batch': batch,
+        'section': section,
+        'class_type': class_type,
+    }))
+
+def row_chunks(records, positions):
+    """Yield lists of row dicts for the given row positions, ROW_CHUNK at a time"""
+    for start in range(0, len(positions), ROW_CHUNK):
+        yield [records[i] for i in positions[start:start + ROW_CHUNK]]
+
+def render_html_table(rows):
+    # Same markup DataFrame.to_html(classes='timetable-table', index=False) gives
+    parts = ['<table border="1" class="dataframe timetable-table">\n  <thead>\n    <tr style="text-align: right;">\n']
+    parts.extend(f'      <th>{column}</th>\n' for column in display_columns)
+    parts.append('    </tr>\n  </thead>\n  <tbody>\n')
+    for row in rows:
+        parts.append('    <tr>\n')
+        parts.extend(f'      <td>{escape(str(row[column]), quote=False)}</td>\n' for column in display_columns)
+        parts.append('    </tr>\n')
+    parts.append('  </tbody>\n</table>')
+    return ''.join(parts)
+
+def render_timetable(snap, day, batch, section, class_type):
+    positions = filter_positions(snap, day, batch, section, class_type)
+    return {
+        'html': render_html_table(snap.records[i] for i in positions),
+        'count': len(positions)
+    }
+
+def find_free_rooms(snap, day, time_slot):
+    slot = parse_class_time(time_slot)
+    if slot is None or slot[0] >= slot[1]:
+        return {'error': 'Please enter a valid time slot (HH:MM-HH:MM)'}
     
-    # 4. Calculate class duration in minutes
-    def calculate_duration(time_str):
-        if pd.isna(time_str) or '-' not in str(time_str):
-            return 0
-        try:
-            start_time, end_time = str(time_str).split('-')
-            start_parts = start_time.strip().split(':')
-            end_parts = end_time.strip().split(':')
-            
-            start_minutes = int(start_parts[0]) * 60 + int(start_parts[1])
-            end_minutes = int(end_parts[0]) * 60 + int(end_parts[1])
-            
-            # Handle PM times (times before 8:30 are PM)
-            start_hour = int(start_parts[0])
-            end_hour = int(end_parts[0])
-            
-            if start_hour < 8 or (start_hour == 8 and int(start_parts[1]) < 30):
-                start_minutes += 12 * 60
-            if end_hour < 8 or (end_hour == 8 and int(end_parts[1]) < 30):
-                end_minutes += 12 * 60
-                
-            return end_minutes - start_minutes
-        except:
-            return 0
-    
-    df['Duration'] = df['Class Time'].apply(calculate_duration)
-    df['StartTime'] = df['Class Time'].apply(get_start_time)
-    
-    # 5. Remove duplicate classes, keeping the one with longest duration
-    def deduplicate_classes(group):
-        if len(group) == 1:
-            return group
-        # For duplicate classes, keep the one with maximum duration
-        return group.loc[group['Duration'].idxmax()].to_frame().T
-    
-    # Group by Day, Course Name, Room, Section, Batch and keep longest duration
-    df = df.groupby(['Day', 'Course Name', 'Room No', 'Section', 'Batch'], dropna=False).apply(deduplicate_classes).reset_index(drop=True)
-    
-    return df
-
-timetable_df = preprocess_timetable()
+    free_rooms = snap.free_time.free_rooms(day, *slot)
+    return {
+        'free_rooms': free_rooms,
+        'count': len(free_rooms)
+    }
+
+@app.before_request
+def start_profiling():
+    g.request_started = time.perf_counter()
+    # An admin can ask for a profile of one request with X-Profile: 1
+    g.profile_requested = request.headers.get('X-Profile') == '1' and is_admin(request)
+    if g.profile_requested or profiling.PROFILE_REQUESTS:
+        g.sampler = profiling.start_sampler()
+
+def record_request(info, status, sampler, profile_path=None):
+    """Stop the sampler, keep the profile if it was asked for or the request
+    was slow, and log slow requests. Returns the profile path, if any."""
+    elapsed_ms = (time.perf_counter() - info['started']) * 1000
+    slow = profiling.SLOW_MS is not None and elapsed_ms > profiling.SLOW_MS
+    if sampler is not None:
+        sampler.stop()
+        if info['profile_requested'] or slow:
+            profile_path = sampler.save(info['label'], profile_path)
+        else:
+            profile_path = None
+    if slow:
+        profiling.record_slow({
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'method': info['method'],
+            'path': info['path'],
+            'args': info['args'],
+            'status': status,
+            'ms': round(elapsed_ms, 1),
+            'snapshot': info['snapshot'],
+            'profile': profile_path,
+        })
+    return profile_path
+
+@app.after_request
+def finish_profiling(response):
+    sampler = g.pop('sampler', None)
+    info = {
+        'started': g.request_started,
+        'profile_requested': g.profile_requested,
+        'label': request.endpoint or request.path,
+        'method': request.method,
+        'path': request.path,
+        'args': request.values.to_dict(),
+        'snapshot': snapshot.version,
+    }
+    if not response.is_streamed:
+        profile_path = record_request(info, response.status_code, sampler)
+        if sampler is not None and g.profile_requested:
+            response.headers['X-Profile-File'] = os.path.basename(profile_path)
+            response.headers['X-Profile-Overhead'] = f'{sampler.overhead():.4f}'
+        return response
+
+    # A streamed body is produced after this hook returns, so time and
+    # profile the request when the server closes the response. The headers
+    # go out first: name the profile file now, the overhead is not known yet.
+    profile_path = None
+    if sampler is not None and g.profile_requested:
+        profile_path = profiling.profile_path(info['label'])
+        response.headers['X-Profile-File'] = os.path.basename(profile_path)
+    status = response.status_code
+    response.call_on_close(lambda: record_request(info, status, sampler, profile_path))
+    return response
 
 @app.route('/')
 def index():
-    # Get unique days, batches, and sections for the dropdowns
-    days = sorted(timetable_df['Day'].unique())
-    batches = sorted(timetable_df['Batch'].dropna().unique())
-    sections = sorted(timetable_df['Section'].dropna().unique())
-    
-    return render_template('index.html', days=days, batches=batches, sections=sections)
+    return render_template('index.html', **snapshot.options)
 
 @app.route('/get_filtered_timetable', methods=['POST'])
 def get_filtered_timetable():
@@ -117,46 +228,262 @@ def get_filtered_timetable():
     section = request.form.get('section')
     class_type = request.form.get('class_type', 'All')
     
-    # Filter the timetable based on selections
-    filtered_df = timetable_df.copy()
+    snap = snapshot
+    key = (snap.version, day, batch, section, class_type)
+    return jsonify(render_flight.do(key, render_timetable, snap, day, batch, section, class_type))
+
+@app.route('/get_timetable_rows', methods=['GET', 'POST'])
+def get_timetable_rows():
+    params = request.values
+    snap = snapshot
+    positions = filter_positions(
+        snap,
+        params.get('day'),
+        params.get('batch'),
+        params.get('section'),
+        params.get('class_type', 'All'),
+    )
+    
+    if params.get('format', 'ndjson') == 'ndjson':
+        # One JSON object per line, written a chunk at a time
+        def generate():
+            for rows in row_chunks(snap.records, positions):
+                yield ''.join(json.dumps(row) + '\n' for row in rows)
+        
+        response = Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+        response.headers['X-Total-Count'] = str(len(positions))
+        return response
     
-    if day and day != 'All':
-        filtered_df = filtered_df[filtered_df['Day'] == day]
+    # Paginated JSON; the cursor is "<snapshot version>:<offset>"
+    offset = 0
+    cursor = params.get('cursor')
+    try:
+        limit = min(max(int(params.get('limit', ROW_CHUNK)), 1), MAX_PAGE_SIZE)
+        if cursor:
+            version, offset = (int(part) for part in cursor.split(':'))
+    except ValueError:
+        return jsonify({'error': 'Invalid cursor or limit'}), 400
+    if cursor and version != snap.version:
+        return jsonify({'error': 'Timetable was reloaded, start again from the first page'}), 409
+    if not 0 <= offset <= len(positions):
+        return jsonify({'error': 'Cursor is out of range'}), 400
     
-    if batch and batch != 'All':
-        filtered_df = filtered_df[filtered_df['Batch'] == batch]
+    end = offset + limit
+    rows = [snap.records[i] for i in positions[offset:end]]
+    return jsonify({
+        'rows': rows,
+        'count': len(positions),
+        'next_cursor': f'{snap.version}:{end}' if end < len(positions) else None
+    })
+
+@app.route('/export/<fmt>', methods=['GET', 'POST'])
+def export_timetable(fmt):
+    if fmt not in exports.FORMATS:
+        return jsonify({'error': f"Unknown format {fmt}, expected one of {', '.join(exports.FORMATS)}"}), 404
+    params = request.values
+    filters = (
+        params.get('day', 'All'),
+        params.get('batch', 'All'),
+        params.get('section', 'All'),
+        params.get('class_type', 'All'),
+    )
+    snap = snapshot
+    positions = filter_positions(snap, *filters)
     
-    if section and section != 'All':
-        filtered_df = filtered_df[filtered_df['Section'] == section]
+    if fmt == 'csv':
+        key = filters
+        write = lambda path: exports.write_csv(path, display_columns, row_chunks(snap.records, positions))
+    elif fmt == 'xlsx':
+        key = filters
+        write = lambda path: exports.write_xlsx(path, display_columns, row_chunks(snap.records, positions))
+    else:
+        try:
+            start = exports.parse_start(params.get('from'))
+            weeks = min(max(int(params.get('weeks', exports.DEFAULT_WEEKS)), 1), 52)
+        except ValueError:
+            return jsonify({'error': 'Expected from as YYYY-MM-DD and weeks as a number'}), 400
+        key = filters + (start.isoformat(), weeks)
+        write = lambda path: exports.write_ics(path, row_chunks(snap.records, positions), start, weeks)
     
-    if class_type and class_type != 'All':
-        filtered_df = filtered_df[filtered_df['Type'] == class_type]
+    export = exports.open_export(snap.version, key, fmt, write)
+    name = '-'.join(re.sub(r'[^A-Za-z0-9]+', '_', value) for value in filters if value != 'All') or 'all'
+    # send_file streams the cached file from disk a block at a time and
+    # closes it at the end, which lets the cache delete it if evicted
+    response = send_file(export, mimetype=exports.FORMATS[fmt],
+                         as_attachment=True, download_name=f'timetable-{name}.{fmt}')
+    response.headers['X-Total-Count'] = str(len(positions))
+    return response
+
+@app.route('/build_schedule', methods=['POST'])
+def build_schedule():
+    data = request.get_json(silent=True) or {}
+    picks = data.get('picks') if isinstance(data, dict) else None
+    if not isinstance(picks, list) or not all(
+            isinstance(pick, dict) and pick.get('section') and isinstance(pick['section'], str)
+            and all(isinstance(pick.get(field), (str, type(None))) for field in ('course', 'batch'))
+            for pick in picks):
+        return jsonify({'error': 'Expected {"picks": [{"course": ..., "section": ..., "batch": ...}, ...]} with string values'}), 400
     
-    # Sort by time
-    filtered_df = filtered_df.sort_values('StartTime')
+    snap = snapshot
+    # Section codes repeat across intakes, so a pick without a batch has to
+    # name one when the section exists in more than one
+    ambiguous = []
+    for pick in picks:
+        if not pick.get('batch'):
+            batches = snap.schedule.batches_for(pick.get('course'), pick['section'])
+            if len(batches) > 1:
+                ambiguous.append({'pick': pick, 'batches': batches})
+    if ambiguous:
+        return jsonify({'error': 'These picks match more than one batch, add "batch" to each', 'ambiguous': ambiguous}), 400
     
-    # Convert to HTML table (drop Duration column as well)
-    display_columns = ['Day', 'Course Name', 'Class Time', 'Room No', 'Section', 'Batch', 'Type']
-    html_table = filtered_df[display_columns].to_html(
-        classes='timetable-table', 
-        index=False
+    return jsonify(snap.schedule.build(picks))
+
+@app.route('/find_free_time', methods=['POST'])
+def find_free_time():
+    data = request.get_json(silent=True) or {}
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Expected a JSON object'}), 400
+    items = data.get('sections') or []
+    days = data.get('days') or data.get('day')
+    if isinstance(days, str):
+        days = None if days == 'All' else [days]
+    if (not isinstance(items, list)
+            or not all(isinstance(item, str) or (isinstance(item, dict) and isinstance(item.get('section'), str)
+                                                 and isinstance(item.get('batch'), (str, type(None))))
+                       for item in items)
+            or not (days is None or isinstance(days, list) and all(isinstance(day, str) for day in days))
+            or not isinstance(data.get('room_type'), (str, type(None)))):
+        return jsonify({'error': 'Expected sections as a list of "section" or {"section": ..., "batch": ...}, '
+                                 'days as a day name or a list of them, and room_type as a string'}), 400
+    sections = []
+    for item in items:
+        if isinstance(item, dict):
+            sections.append((item['section'], item.get('batch')))
+        else:
+            sections.append((item, None))
+    
+    try:
+        minutes = int(data.get('minutes', 80))
+        start = parse_window_time(data.get('from'), DEFAULT_FROM)
+        end = parse_window_time(data.get('to'), DEFAULT_TO)
+    except (TypeError, ValueError, IndexError, AttributeError):
+        return jsonify({'error': 'Expected minutes as a number and from/to as HH:MM'}), 400
+    if minutes <= 0:
+        return jsonify({'error': 'minutes must be positive'}), 400
+    if start >= end:
+        return jsonify({'error': 'from must be before to'}), 400
+    
+    snap = snapshot
+    # Same rule as build_schedule: a section code used by several intakes
+    # needs a batch, or their timetables would be merged
+    ambiguous = []
+    for section, batch in sections:
+        if not batch:
+            batches = snap.free_time.batches_for(section)
+            if len(batches) > 1:
+                ambiguous.append({'section': section, 'batches': batches})
+    if ambiguous:
+        return jsonify({'error': 'These sections exist in more than one batch, give them as {"section": ..., "batch": ...}',
+                        'ambiguous': ambiguous}), 400
+    
+    windows = snap.free_time.query(
+        sections, minutes,
+        days=days,
+        room_type=data.get('room_type'),
+        start=start,
+        end=end,
+        earliest=data.get('mode', 'earliest') != 'all',
     )
+    # Like build_schedule's missing picks: an unknown section would otherwise
+    # look free all day
+    unknown = [{'section': section, 'batch': batch} for section, batch in snap.free_time.unknown_sections(sections)]
+    return jsonify({'windows': windows, 'count': len(windows), 'unknown': unknown})
+
+@app.route('/search_courses')
+def search_courses():
+    query = request.args.get('q', '')
+    try:
+        limit = min(max(int(request.args.get('limit', 10)), 1), 50)
+    except ValueError:
+        limit = 10
     
-    return jsonify({
-        'html': html_table,
-        'count': len(filtered_df)
-    })
+    results = snapshot.search.search(query, limit)
+    return jsonify({'results': results, 'count': len(results)})
 
 @app.route('/get_sections', methods=['POST'])
 def get_sections():
     batch = request.form.get('batch')
+    sections = snapshot.facets.values('section', {'batch': batch}) if batch else []
+    return jsonify({'sections': sections})
+
+@app.route('/get_facets', methods=['POST'])
+def get_facets():
+    selection = {field: request.form.get(field, 'All') for field in FACET_COLUMNS}
+    return jsonify(snapshot.facets.facets(selection))
+
+@app.route('/get_free_rooms', methods=['POST'])
+def get_free_rooms():
+    day = request.form.get('day')
+    time_slot = request.form.get('time_slot', '').strip()
     
-    if batch == 'All':
-        sections = sorted(timetable_df['Section'].dropna().unique())
+    if not day or day == 'All':
+        return jsonify({'error': 'Please select a day'})
+    
+    snap = snapshot
+    key = (snap.version, day, time_slot)
+    return jsonify(free_rooms_flight.do(key, find_free_rooms, snap, day, time_slot))
+
+@app.route('/now')
+def now():
+    # Defaults to the campus clock; ?day=Monday&time=10:15 asks about another moment
+    clock = datetime.now(CAMPUS_TZ)
+    day = request.args.get('day') or DAY_ORDER[clock.weekday()]
+    room = request.args.get('room', '').strip()
+    section = request.args.get('section', '').strip()
+    batch = request.args.get('batch', '').strip()
+    time_arg = request.args.get('time')
+    if time_arg:
+        # Typed times follow the workbook's convention, so 02:00 is 14:00
+        try:
+            minute = parse_clock_time(time_arg)
+        except ValueError:
+            return jsonify({'error': 'Expected time as HH:MM'}), 400
     else:
-        sections = sorted(timetable_df[timetable_df['Batch'] == batch]['Section'].dropna().unique())
+        minute = clock.hour * 60 + clock.minute
+    if day not in DAY_ORDER:
+        return jsonify({'error': f'Unknown day {day}'}), 400
     
-    return jsonify({'sections': sections})
+    snap = snapshot
+    key = timeline_key(room, section, batch)
+    if key is not None and not snap.live.has(key):
+        return jsonify({'error': f'No classes found for {room or section}'}), 404
+    
+    result = snap.live.now(day, minute, room=room, section=section, batch=batch)
+    result.update({'day': day, 'time': format_minutes(minute)})
+    return jsonify(result)
+
+def is_admin(req):
+    token = os.environ.get('ADMIN_TOKEN')
+    return bool(token) and req.headers.get('X-Admin-Token') == token
+
+@app.route('/reload', methods=['POST'])
+def reload():
+    if not is_admin(request):
+        return jsonify({'error': 'Forbidden'}), 403
+    snap = reload_timetable()
+    return jsonify({'version': snap.version, 'count': len(snap.records)})
+
+@app.route('/get_stats')
+def get_stats():
+    return jsonify({
+        'version': snapshot.version,
+        'shadow': shadow_report,
+        'singleflight': {
+            'render': render_flight.stats(),
+            'free_rooms': free_rooms_flight.stats(),
+            'reload': reload_flight.stats(),
+        }
+    })
 
 if __name__ == '__main__':
     app.run(debug=True)
\ No newline at end of file
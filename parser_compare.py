@@ -0,0 +1,164 @@
+"""Run two timetable parsers on the same workbook and diff their events.
+
+    python parser_compare.py TimeTable:get_time_table TimeTable:get_time_table
+    python parser_compare.py TimeTable:get_time_table fast_parser:get_time_table --repeat 3 --output report.json
+
+The first compares the parser with itself, which should report no
+differences; the second is the shape of a run against a new parser module.
+
+Each parser is a zero-argument function returning the Day / Course Name /
+Class Time / Room No / Section / Batch / Type frame. Rows are normalized and
+compared as multisets, and rows that differ only in some fields are paired
+up so the report shows which field changed.
+"""
+import argparse
+from collections import Counter
+import importlib
+import json
+import re
+import statistics
+import time
+
+EVENT_COLUMNS = ['Day', 'Course Name', 'Class Time', 'Room No', 'Section', 'Batch', 'Type']
+# Rows describing the same meeting share these fields
+MATCH_COLUMNS = ['Day', 'Room No', 'Class Time']
+
+def load_parser(spec):
+    module_name, _, function_name = spec.partition(':')
+    module = importlib.import_module(module_name)
+    return getattr(module, function_name or 'get_time_table')
+
+def normalize_value(value):
+    if value is None or value != value:
+        return None
+    if isinstance(value, str):
+        value = re.sub(r'\s+', ' ', value).strip()
+        return value or None
+    return value
+
+def normalize_events(df):
+    """Multiset of normalized event tuples, ignoring row order and index"""
+    rows = df.reindex(columns=EVENT_COLUMNS).itertuples(index=False, name=None)
+    return Counter(tuple(normalize_value(value) for value in row) for row in rows)
+
+def time_parser(parser, repeat=1):
+    timings = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = parser()
+        timings.append(time.perf_counter() - started)
+    return result, timings
+
+def compare_events(baseline, candidate):
+    """Diff two event multisets. Rows missing on one side and extra on the
+    other are paired by Day, Room No and Class Time and reported as field
+    mismatches; the rest are plain missing or extra rows."""
+    missing = baseline - candidate
+    extra = candidate - baseline
+    key_index = [EVENT_COLUMNS.index(column) for column in MATCH_COLUMNS]
+
+    def key(row):
+        return tuple(row[i] for i in key_index)
+
+    extra_by_key = {}
+    for row in extra.elements():
+        extra_by_key.setdefault(key(row), []).append(row)
+
+    mismatches = []
+    unmatched_missing = []
+    for row in missing.elements():
+        candidates = extra_by_key.get(key(row))
+        if not candidates:
+            unmatched_missing.append(row)
+            continue
+        # Pair with the candidate row that differs in the fewest fields
+        other = min(candidates, key=lambda c: sum(a != b for a, b in zip(row, c)))
+        candidates.remove(other)
+        mismatches.append({
+            'key': dict(zip(MATCH_COLUMNS, key(row))),
+            'fields': {
+                column: {'baseline': a, 'candidate': b}
+                for column, a, b in zip(EVENT_COLUMNS, row, other) if a != b
+            },
+        })
+    unmatched_extra = [row for rows in extra_by_key.values() for row in rows]
+
+    return {
+        'baseline_rows': sum(baseline.values()),
+        'candidate_rows': sum(candidate.values()),
+        'matching_rows': sum((baseline & candidate).values()),
+        'mismatches': mismatches,
+        'missing': [dict(zip(EVENT_COLUMNS, row)) for row in unmatched_missing],
+        'extra': [dict(zip(EVENT_COLUMNS, row)) for row in unmatched_extra],
+        'identical': not missing and not extra,
+    }
+
+def timing_summary(timings):
+    return {
+        'runs': len(timings),
+        'min_s': min(timings),
+        'median_s': statistics.median(timings),
+    }
+
+def compare_parsers(baseline, candidate, repeat=1):
+    baseline_df, baseline_timings = time_parser(baseline, repeat)
+    candidate_df, candidate_timings = time_parser(candidate, repeat)
+    report = compare_events(normalize_events(baseline_df), normalize_events(candidate_df))
+    report['timings'] = {
+        'baseline': timing_summary(baseline_timings),
+        'candidate': timing_summary(candidate_timings),
+    }
+    return report
+
+def summary_lines(report, limit=20):
+    baseline = report['timings']['baseline']
+    candidate = report['timings']['candidate']
+    lines = [
+        f"rows: baseline {report['baseline_rows']}, candidate {report['candidate_rows']}, "
+        f"matching {report['matching_rows']}",
+        f"time: baseline {baseline['median_s']:.3f}s, candidate {candidate['median_s']:.3f}s "
+        f"(median of {baseline['runs']})",
+    ]
+    if report['identical']:
+        lines.append('events are identical')
+        return lines
+    lines.append(f"{len(report['mismatches'])} changed, {len(report['missing'])} missing, "
+                 f"{len(report['extra'])} extra")
+    for mismatch in report['mismatches'][:limit]:
+        where = ' '.join(str(value) for value in mismatch['key'].values())
+        changes = ', '.join(f"{column}: {change['baseline']!r} -> {change['candidate']!r}"
+                            for column, change in mismatch['fields'].items())
+        lines.append(f"  changed {where}: {changes}")
+    for label in ('missing', 'extra'):
+        for row in report[label][:limit]:
+            lines.append(f"  {label} " + ' | '.join(str(row[column]) for column in EVENT_COLUMNS))
+    return lines
+
+def run_shadow(spec, baseline_df, baseline_seconds):
+    """Compare an already parsed frame with a shadow parser's output.
+    Used by main.load_snapshot when SHADOW_PARSER is set."""
+    candidate_df, timings = time_parser(load_parser(spec))
+    report = compare_events(normalize_events(baseline_df), normalize_events(candidate_df))
+    report['timings'] = {
+        'baseline': timing_summary([baseline_seconds]),
+        'candidate': timing_summary(timings),
+    }
+    report['shadow_parser'] = spec
+    return report
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('baseline', help='module:function of the trusted parser')
+    parser.add_argument('candidate', help='module:function of the parser being evaluated')
+    parser.add_argument('--repeat', type=int, default=1, help='runs per parser for the timings')
+    parser.add_argument('--limit', type=int, default=20, help='differences to print per kind')
+    parser.add_argument('--output', help='write the full report as JSON')
+    args = parser.parse_args()
+
+    report = compare_parsers(load_parser(args.baseline), load_parser(args.candidate), args.repeat)
+    print('\n'.join(summary_lines(report, args.limit)))
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2, default=str)
+    raise SystemExit(0 if report['identical'] else 1)
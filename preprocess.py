@@ -0,0 +1,124 @@
+"""Parse step: workbook -> cleaned rows. This is the only part of the app
+that needs pandas and openpyxl; main.py imports it lazily.
+
+    python preprocess.py [timetable.json]
+
+parses the workbook and writes the compact data file that
+TIMETABLE_DATA points the server at.
+"""
+import re
+import sys
+import time
+
+import pandas as pd
+
+from TimeTable import get_time_table
+from timeslots import parse_class_time
+import datafile
+
+# Load and preprocess the timetable data
+def preprocess_timetable(df=None):
+    if df is None:
+        df = get_time_table()
+    
+    # 1. Separate theory and lab classes
+    df['Type'] = df.apply(lambda row: 'Lab' if 'Lab' in str(row['Course Name']) else row['Type'], axis=1)
+    
+    # Replace this section normalization:
+# df['Section'] = df['Section'].apply(lambda x: x.split('-')[0] + '-' + x.split('-')[1][0] 
+#                                   if x and '-' in str(x) and len(str(x).split('-')[1]) > 1 else x)
+
+    # With this version that preserves A1, A2, etc. patterns:
+    def normalize_section(section):
+        if not section or pd.isna(section):
+            return section
+        section = str(section)
+        # If section matches pattern like AI-A1, AI-B2, etc., keep as is
+        if re.match(r'^[A-Z]{2,3}-[A-Z]\d+$', section):
+            return section
+        # Otherwise normalize other section formats
+        if '-' in section and len(section.split('-')[1]) > 1:
+            return section.split('-')[0] + '-' + section.split('-')[1][0]
+        return section
+
+    df['Section'] = df['Section'].apply(normalize_section)
+    
+    # 3. Convert times to proper datetime for sorting
+    def get_start_time(time_str):
+        if pd.isna(time_str):
+            return pd.to_datetime('23:59', format='%H:%M')  # Put invalid times at end
+        
+        try:
+            start_time = time_str.split('-')[0].strip()
+            
+            # Parse the time
+            time_obj = pd.to_datetime(start_time, format='%H:%M')
+            hour = time_obj.hour
+            minute = time_obj.minute
+            
+            # Since classes run from 8:30 AM to 5:15 PM (17:15)
+            # Any time before 8:30 should be interpreted as PM (add 12 hours)
+            if hour < 8 or (hour == 8 and minute < 30):
+                # This is PM time, convert to 24-hour format
+                if hour != 12:  # Don't add 12 to 12 PM
+                    hour += 12
+                time_obj = pd.to_datetime(f'{hour:02d}:{minute:02d}', format='%H:%M')
+            
+            return time_obj
+            
+        except Exception as e:
+            print(f"Error parsing time '{time_str}': {e}")
+            return pd.to_datetime('23:59', format='%H:%M')  # Put invalid times at end
+    
+    # 4. Calculate class duration in minutes
+    def calculate_duration(time_str):
+        span = parse_class_time(time_str)
+        if span is None:
+            return 0
+        return span[1] - span[0]
+    
+    df['Duration'] = df['Class Time'].apply(calculate_duration)
+    df['StartTime'] = df['Class Time'].apply(get_start_time)
+    
+    # 5. Remove duplicate classes, keeping the one with longest duration
+    def deduplicate_classes(group):
+        if len(group) == 1:
+            return group
+        # For duplicate classes, keep the one with maximum duration
+        return group.loc[group['Duration'].idxmax()].to_frame().T
+    
+    # Group by Day, Course Name, Room, Section, Batch and keep longest duration
+    df = df.groupby(['Day', 'Course Name', 'Room No', 'Section', 'Batch'], dropna=False).apply(deduplicate_classes).reset_index(drop=True)
+    
+    return df
+
+def clean_value(value):
+    # NaN is not valid JSON, and numpy scalars are not JSON either
+    if value is None or value != value:
+        return None
+    if hasattr(value, 'item'):
+        return value.item()
+    return value
+
+def records_from_frame(df, columns):
+    """Plain dict rows in StartTime order (stable, so ties keep parse order)"""
+    ordered = df.sort_values('StartTime', kind='stable')
+    return [
+        {column: clean_value(value) for column, value in zip(columns, values)}
+        for values in ordered[columns].itertuples(index=False, name=None)
+    ]
+
+def parse_timetable(columns=datafile.COLUMNS):
+    """Parse the workbook. Returns the raw get_time_table frame, how long
+    it took, and the cleaned records the server uses."""
+    started = time.perf_counter()
+    raw_df = get_time_table()
+    parse_seconds = time.perf_counter() - started
+    df = preprocess_timetable(raw_df.copy())
+    return raw_df, parse_seconds, records_from_frame(df, columns)
+
+if __name__ == '__main__':
+    path = sys.argv[1] if len(sys.argv) > 1 else datafile.DEFAULT_PATH
+    _, parse_seconds, records = parse_timetable()
+    datafile.save_records(path, datafile.COLUMNS, records)
+    print(f"Wrote {len(records)} rows to {path} (parsed in {parse_seconds:.1f}s)")
@@ -0,0 +1,124 @@
+"""Opt-in sampling profiler for single requests and workbook loads.
+
+Everything is off unless one of these is set:
+
+    PROFILE_REQUESTS=1      sample every request, keep profiles of slow ones
+    PROFILE_LOAD=1          sample each get_time_table run
+    PROFILE_SLOW_MS=500     latency above which a request is logged as slow
+    X-Profile: 1 header     profile that one request (needs X-Admin-Token)
+
+Profiles are written to PROFILE_DIR (default 'profiles') as collapsed
+stacks, one "frame;frame;frame count" line per stack, which
+flamegraph.pl and speedscope read directly.
+"""
+from collections import Counter
+from contextlib import contextmanager
+import itertools
+import json
+import os
+import sys
+import threading
+import time
+
+PROFILE_DIR = os.environ.get('PROFILE_DIR', 'profiles')
+PROFILE_REQUESTS = os.environ.get('PROFILE_REQUESTS') == '1'
+PROFILE_LOAD = os.environ.get('PROFILE_LOAD') == '1'
+# Slow requests are only logged when asked for, or while sampling requests
+if 'PROFILE_SLOW_MS' in os.environ:
+    SLOW_MS = float(os.environ['PROFILE_SLOW_MS'])
+else:
+    SLOW_MS = 500.0 if PROFILE_REQUESTS else None
+INTERVAL = float(os.environ.get('PROFILE_INTERVAL_MS', 5)) / 1000
+# Share of wall time the sampler may spend walking stacks before it backs off
+MAX_OVERHEAD = float(os.environ.get('PROFILE_MAX_OVERHEAD', 0.02))
+MAX_INTERVAL = 0.1
+
+_sequence = itertools.count()
+
+def frame_name(frame):
+    code = frame.f_code
+    return f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})'
+
+class Sampler:
+    """Samples one thread's stack from a background thread"""
+
+    def __init__(self, thread_id, interval=INTERVAL, max_overhead=MAX_OVERHEAD):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.max_overhead = max_overhead
+        self.stacks = Counter()
+        self.samples = 0
+        self.sampling_time = 0.0
+        self.elapsed = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self.started = time.perf_counter()
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self.elapsed = time.perf_counter() - self.started
+        return self
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            began = time.perf_counter()
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                break
+            stack = []
+            while frame is not None:
+                stack.append(frame_name(frame))
+                frame = frame.f_back
+            self.stacks[';'.join(reversed(stack))] += 1
+            self.samples += 1
+            self.sampling_time += time.perf_counter() - began
+            # Keep the overhead under the cap by sampling less often
+            if self.sampling_time > self.max_overhead * (time.perf_counter() - self.started):
+                self.interval = min(self.interval * 2, MAX_INTERVAL)
+
+    def overhead(self):
+        return self.sampling_time / self.elapsed if self.elapsed else 0.0
+
+    def collapsed(self):
+        return ''.join(f'{stack} {count}\n' for stack, count in self.stacks.most_common())
+
+    def save(self, label, path=None):
+        if path is None:
+            path = profile_path(label)
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(self.collapsed())
+        return path
+
+def profile_path(label):
+    """A new file name in PROFILE_DIR for a profile of `label`"""
+    safe_label = ''.join(c if c.isalnum() or c in '-_' else '_' for c in label).strip('_') or 'root'
+    return os.path.join(PROFILE_DIR, f'{time.strftime("%Y%m%d-%H%M%S")}-{safe_label}-{os.getpid()}-{next(_sequence)}.collapsed')
+
+def start_sampler():
+    return Sampler(threading.get_ident()).start()
+
+@contextmanager
+def profiled(label, enabled=True):
+    """Sample the current thread for the duration of the block and save it"""
+    if not enabled:
+        yield None
+        return
+    sampler = start_sampler()
+    try:
+        yield sampler
+    finally:
+        sampler.stop()
+        path = sampler.save(label)
+        print(f"Profile of {label}: {sampler.elapsed * 1000:.0f} ms, {sampler.samples} samples, "
+              f"{sampler.overhead() * 100:.1f}% sampling overhead -> {path}")
+
+def record_slow(entry):
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    with open(os.path.join(PROFILE_DIR, 'slow_requests.jsonl'), 'a') as f:
+        f.write(json.dumps(entry) + '\n')
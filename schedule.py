@@ -0,0 +1,102 @@
+from collections import namedtuple
+import re
+
+from timeslots import parse_class_time, format_minutes
+
+DAY_ORDER = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+Event = namedtuple('Event', ['day', 'start', 'end', 'course', 'section', 'room', 'batch', 'type', 'class_time'])
+
+def normalize_course(name):
+    return re.sub(r'\s+', ' ', str(name)).strip().lower()
+
+def is_meeting(record):
+    """Free slots and FSM blocks are not something a student can pick"""
+    course = record['Course Name']
+    return bool(course) and record['Section'] and not str(course).startswith('Free Slot') and course != 'FSM'
+
+def event_to_dict(event):
+    return {
+        'day': event.day,
+        'start': format_minutes(event.start),
+        'end': format_minutes(event.end),
+        'course': event.course,
+        'section': event.section,
+        'room': event.room,
+        'batch': event.batch,
+        'type': event.type,
+        'class_time': event.class_time,
+    }
+
+class ScheduleIndex:
+    """Per-section event lists built once per snapshot, so a schedule is
+    assembled from dictionary lookups rather than DataFrame filters."""
+
+    def __init__(self, records):
+        self.by_section = {}
+        self.by_pick = {}
+        for record in records:
+            if not is_meeting(record):
+                continue
+            span = parse_class_time(record['Class Time'])
+            if span is None:
+                continue
+            event = Event(
+                record['Day'], span[0], span[1], record['Course Name'], record['Section'],
+                record['Room No'], record['Batch'], record['Type'], record['Class Time'],
+            )
+            self.by_section.setdefault(event.section, []).append(event)
+            self.by_pick.setdefault((normalize_course(event.course), event.section), []).append(event)
+
+    def events_for(self, course, section, batch=None):
+        if course:
+            events = self.by_pick.get((normalize_course(course), section), [])
+        else:
+            events = self.by_section.get(section, [])
+        # Section codes repeat across batches (AI-C exists in several intakes)
+        if batch:
+            events = [event for event in events if event.batch == batch]
+        return events
+
+    def batches_for(self, course, section):
+        """Batches whose timetable has this (course, section) pick"""
+        return sorted({event.batch for event in self.events_for(course, section)}, key=str)
+
+    def build(self, picks):
+        """Merge the events of every (course, section[, batch]) pick into a
+        week grid and report meetings that overlap on the same day."""
+        events = set()
+        missing = []
+        for pick in picks:
+            found = self.events_for(pick.get('course'), pick.get('section'), pick.get('batch'))
+            if not found:
+                missing.append(pick)
+            events.update(found)
+
+        by_day = {}
+        for event in events:
+            by_day.setdefault(event.day, []).append(event)
+
+        week = {}
+        conflicts = []
+        for day in sorted(by_day, key=lambda d: DAY_ORDER.index(d) if d in DAY_ORDER else len(DAY_ORDER)):
+            day_events = sorted(by_day[day], key=lambda e: (e.start, e.end, e.course))
+            week[day] = [event_to_dict(event) for event in day_events]
+            # Sweep in start order, keeping the meetings that are still running
+            active = []
+            for event in day_events:
+                active = [other for other in active if other.end > event.start]
+                for other in active:
+                    conflicts.append({
+                        'day': day,
+                        'first': event_to_dict(other),
+                        'second': event_to_dict(event),
+                    })
+                active.append(event)
+
+        return {
+            'week': week,
+            'conflicts': conflicts,
+            'missing': missing,
+            'count': len(events),
+        }
@@ -0,0 +1,95 @@
+import re
+
+from timeslots import parse_class_time, format_minutes
+from schedule import DAY_ORDER
+
+def normalize_text(text):
+    return re.sub(r'[^a-z0-9]+', ' ', str(text).lower()).strip()
+
+def trigrams(text):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+def meeting_sort_key(meeting):
+    day = DAY_ORDER.index(meeting['day']) if meeting['day'] in DAY_ORDER else len(DAY_ORDER)
+    span = parse_class_time(meeting['class_time'])
+    return day, span[0] if span else 24 * 60, meeting['room'] or ''
+
+class CourseSearchIndex:
+    """Trigram index over course names and section codes, built once per
+    snapshot. Queries shorter than a trigram fall back to a word-prefix
+    index."""
+
+    def __init__(self, records):
+        courses = {}
+        for record in records:
+            name = record['Course Name']
+            if not name or str(name).startswith('Free Slot') or name == 'FSM':
+                continue
+            course = courses.setdefault(name, {'sections': set(), 'meetings': []})
+            if record['Section']:
+                course['sections'].add(record['Section'])
+            course['meetings'].append({
+                'day': record['Day'],
+                'class_time': record['Class Time'],
+                'room': record['Room No'],
+                'section': record['Section'],
+                'batch': record['Batch'],
+                'type': record['Type'],
+            })
+
+        self.docs = []
+        self.names = []
+        self.texts = []
+        self.grams = {}
+        self.prefixes = {}
+        for name in sorted(courses, key=str):
+            course = courses[name]
+            doc_id = len(self.docs)
+            meetings = sorted(course['meetings'], key=meeting_sort_key)
+            for meeting in meetings:
+                span = parse_class_time(meeting['class_time'])
+                meeting['start'] = format_minutes(span[0]) if span else None
+                meeting['end'] = format_minutes(span[1]) if span else None
+            self.docs.append({
+                'course': name,
+                'sections': sorted(course['sections']),
+                'meetings': meetings,
+            })
+            normalized_name = normalize_text(name)
+            text = ' '.join([normalized_name] + [normalize_text(s) for s in sorted(course['sections'])])
+            self.names.append(normalized_name)
+            self.texts.append(text)
+            for gram in trigrams(text):
+                self.grams.setdefault(gram, set()).add(doc_id)
+            for word in text.split():
+                for size in (1, 2):
+                    self.prefixes.setdefault(word[:size], set()).add(doc_id)
+
+    def candidates(self, query):
+        if len(query) < 3:
+            return self.prefixes.get(query, set())
+        postings = [self.grams.get(gram) for gram in trigrams(query)]
+        if not all(postings):
+            return set()
+        postings.sort(key=len)
+        result = set(postings[0])
+        for posting in postings[1:]:
+            result &= posting
+        return result
+
+    def search(self, query, limit=10):
+        query = normalize_text(query)
+        if not query:
+            return []
+        # Trigram hits can still miss the exact substring, so confirm each one
+        matches = [doc_id for doc_id in self.candidates(query) if query in self.texts[doc_id]]
+        # Names that start with the query first, then word starts, then the rest
+        def rank(doc_id):
+            name = self.names[doc_id]
+            if name.startswith(query):
+                return 0, name
+            if (' ' + query) in (' ' + self.texts[doc_id]):
+                return 1, name
+            return 2, name
+        matches.sort(key=rank)
+        return [self.docs[doc_id] for doc_id in matches[:limit]]
@@ -0,0 +1,101 @@
+import threading
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Run one computation per key at a time and share its result with
+    every caller that arrives while it is still running."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        # Runs queued by do_fresh behind the one in _calls
+        self._pending = {}
+        self.calls = 0
+        self.executed = 0
+        self.coalesced = 0
+
+    def do(self, key, fn, *args, **kwargs):
+        with self._lock:
+            self.calls += 1
+            call = self._calls.get(key) or self._pending.get(key)
+            if call is not None:
+                # Someone is already computing this key, wait for them
+                self.coalesced += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self.executed += 1
+                leader = True
+
+        if not leader:
+            return self._wait(call)
+        return self._run(key, call, fn, args, kwargs)
+
+    def do_fresh(self, key, fn, *args, **kwargs):
+        """Like do, but only share a run that starts after this call. If one
+        is already running, wait for it and then run once more; callers
+        arriving meanwhile share that next run."""
+        with self._lock:
+            self.calls += 1
+            running = self._calls.get(key)
+            call = self._pending.get(key)
+            if call is not None:
+                self.coalesced += 1
+                leader = False
+            else:
+                call = _Call()
+                if running is None:
+                    self._calls[key] = call
+                else:
+                    self._pending[key] = call
+                self.executed += 1
+                leader = True
+
+        if not leader:
+            return self._wait(call)
+        if running is not None:
+            running.done.wait()
+            with self._lock:
+                del self._pending[key]
+                self._calls[key] = call
+        return self._run(key, call, fn, args, kwargs)
+
+    def _wait(self, call):
+        call.done.wait()
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def _run(self, key, call, fn, args, kwargs):
+        try:
+            call.result = fn(*args, **kwargs)
+        except BaseException as e:
+            # Followers must see a failure too, not a None result
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._calls) + len(self._pending)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'calls': self.calls,
+                'executed': self.executed,
+                'coalesced': self.coalesced,
+                'in_flight': len(self._calls) + len(self._pending),
+            }
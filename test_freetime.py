@@ -0,0 +1,99 @@
+import random
+
+from freetime import FreeTimeIndex, span_mask, run_starts, runs
+from timeslots import parse_class_time, format_minutes
+
+DAYS = ['Monday', 'Tuesday', 'Wednesday']
+SECTIONS = ['AI-A', 'AI-B', 'CS-A']
+ROOMS = {'C-301': 'Class', 'C-302': 'Class', 'D-Lab 1': 'Lab'}
+
+def bits(mask, width):
+    return [bool(mask >> i & 1) for i in range(width)]
+
+def workbook_time(minutes):
+    # The workbook writes afternoon times without AM/PM
+    hour, minute = divmod(minutes, 60)
+    return f'{hour - 12 if hour > 12 else hour:02d}:{minute:02d}'
+
+def random_records(rng, count):
+    records = []
+    for _ in range(count):
+        start = rng.randrange(510, 1000, 5)
+        end = min(start + rng.choice([50, 80, 165]), 1035)
+        room = rng.choice(list(ROOMS))
+        records.append({
+            'Day': rng.choice(DAYS),
+            'Course Name': rng.choice(['PF', 'Calculus', 'Free Slot']),
+            'Class Time': f'{workbook_time(start)}-{workbook_time(end)}',
+            'Room No': room,
+            'Section': rng.choice(SECTIONS),
+            'Batch': 'BS AI (2024)',
+            'Type': ROOMS[room],
+        })
+    return records
+
+def test_span_mask():
+    assert bits(span_mask(2, 5), 8) == [False, False, True, True, True, False, False, False]
+    assert span_mask(5, 5) == 0
+    assert span_mask(6, 2) == 0
+
+def test_run_starts_matches_brute_force():
+    rng = random.Random(1)
+    for _ in range(500):
+        mask = rng.getrandbits(64)
+        length = rng.randint(1, 20)
+        set_bits = bits(mask, 64)
+        expected = [i for i in range(64) if all(set_bits[i:i + length]) and i + length <= 64]
+        assert [i for i, bit in enumerate(bits(run_starts(mask, length), 64)) if bit] == expected
+
+def test_runs_matches_brute_force():
+    rng = random.Random(2)
+    for _ in range(500):
+        mask = rng.getrandbits(64)
+        expected = []
+        start = None
+        for i, bit in enumerate(bits(mask, 65)):
+            if bit and start is None:
+                start = i
+            elif not bit and start is not None:
+                expected.append((start, i))
+                start = None
+        assert list(runs(mask)) == expected
+
+def brute_force_earliest(records, sections, minutes, start, end):
+    busy = lambda r: r['Course Name'] != 'Free Slot'
+    for day in DAYS:
+        best_rooms = []
+        for s in range(start, end - minutes + 1):
+            window = range(s, s + minutes)
+
+            def clashes(record):
+                span = parse_class_time(record['Class Time'])
+                return busy(record) and record['Day'] == day and span[0] < window.stop and window.start < span[1]
+
+            if any(clashes(r) for r in records if r['Section'] in sections):
+                continue
+            # Only rooms listed on that day's sheet can be offered
+            day_rooms = {r['Room No'] for r in records if r['Day'] == day}
+            rooms = sorted(room for room in day_rooms
+                           if not any(clashes(r) for r in records if r['Room No'] == room))
+            if rooms:
+                best_rooms = rooms
+                break
+        if best_rooms:
+            return [{'day': day, 'start': format_minutes(s), 'end': format_minutes(s + minutes), 'rooms': best_rooms}]
+    return []
+
+def test_earliest_window_matches_brute_force():
+    rng = random.Random(3)
+    for _ in range(30):
+        records = random_records(rng, 40)
+        index = FreeTimeIndex(records)
+        sections = rng.sample(SECTIONS, rng.randint(1, 2))
+        minutes = rng.choice([30, 80, 120])
+        got = index.query([(section, None) for section in sections], minutes, start=510, end=1035)
+        assert got == brute_force_earliest(records, sections, minutes, 510, 1035)
+
+def test_unknown_sections_are_reported():
+    index = FreeTimeIndex(random_records(random.Random(4), 40))
+    assert index.unknown_sections([('AI-A', None), ('ZZZ-Q', None), ('AI-A', 'nope')]) == [('ZZZ-Q', None), ('AI-A', 'nope')]
@@ -0,0 +1,73 @@
+import random
+from collections import Counter
+
+from live import LiveIndex
+from schedule import DAY_ORDER
+from timeslots import parse_class_time, time_to_minutes
+from test_freetime import random_records, ROOMS, SECTIONS
+
+def matches(record, room, section):
+    if record['Course Name'] == 'Free Slot':
+        return False
+    return record['Room No'] == room if room else record['Section'] == section
+
+def brute_force_now(records, day, minute, room=None, section=None):
+    current = Counter()
+    upcoming = []
+    for record in records:
+        if not matches(record, room, section):
+            continue
+        start, end = parse_class_time(record['Class Time'])
+        if record['Day'] == day and start <= minute < end:
+            current[record['Course Name'], record['Class Time']] += 1
+        # Minutes until the class next starts, wrapping around the week
+        offset = (DAY_ORDER.index(record['Day']) - DAY_ORDER.index(day)) % 7 * 24 * 60 + start - minute
+        if offset <= 0:
+            offset += 7 * 24 * 60
+        upcoming.append((offset, record['Course Name'], record['Class Time']))
+    if not upcoming:
+        return current, Counter()
+    first = min(offset for offset, _, _ in upcoming)
+    return current, Counter((course, time) for offset, course, time in upcoming if offset == first)
+
+def summarize(events):
+    return Counter((event['course'], event['class_time']) for event in events)
+
+def test_now_matches_brute_force():
+    rng = random.Random(5)
+    for _ in range(10):
+        records = random_records(rng, 60)
+        index = LiveIndex(records)
+        for _ in range(300):
+            day = rng.choice(DAY_ORDER)
+            minute = rng.randrange(480, 1080)
+            if rng.random() < 0.5:
+                kwargs = {'room': rng.choice(list(ROOMS))}
+            else:
+                kwargs = {'section': rng.choice(SECTIONS)}
+            result = index.now(day, minute, **kwargs)
+            current, upcoming = brute_force_now(records, day, minute, **kwargs)
+            assert summarize(result['current']) == current
+            assert summarize(result['next']) == upcoming
+
+def test_afternoon_times_use_the_pm_rule():
+    records = [{
+        'Day': 'Monday', 'Course Name': 'PF', 'Class Time': '01:00-02:20', 'Room No': 'C-301',
+        'Section': 'AI-A', 'Batch': 'BS AI (2024)', 'Type': 'Class',
+    }]
+    index = LiveIndex(records)
+    assert [e['course'] for e in index.now('Monday', time_to_minutes('01:30'), room='C-301')['current']] == ['PF']
+    assert index.now('Monday', 90, room='C-301')['current'] == []
+    assert index.now('Monday', 14 * 60 + 19, room='C-301')['current']
+    assert not index.now('Monday', 14 * 60 + 20, room='C-301')['current']
+
+def test_times_inside_a_bucket():
+    # Starts and ends mid-bucket, so neighbours in the same bucket are not running
+    records = [{
+        'Day': 'Tuesday', 'Course Name': 'PF', 'Class Time': '10:03-10:07', 'Room No': 'C-301',
+        'Section': 'AI-A', 'Batch': 'BS AI (2024)', 'Type': 'Class',
+    }]
+    index = LiveIndex(records)
+    assert [bool(index.now('Tuesday', 600 + m, room='C-301')['current']) for m in range(1, 9)] == \
+        [False, False, True, True, True, True, False, False]
+    assert index.now('Tuesday', 600 + 8, room='C-301')['next'][0]['day'] == 'Tuesday'
@@ -0,0 +1,37 @@
+import re
+
+# Classes run from 8:30 AM to 5:15 PM, and the workbook writes afternoon
+# times without AM/PM, so anything before 8:30 is read as PM.
+DAY_START = 8 * 60 + 30
+
+def time_to_minutes(time_str):
+    parts = time_str.strip().split(':')
+    hour = int(parts[0])
+    minute = int(parts[1])
+    minutes = hour * 60 + minute
+    if minutes < DAY_START:
+        minutes += 12 * 60
+    return minutes
+
+def parse_clock_time(time_str):
+    """Minutes for a typed 'H:MM' or 'HH:MM' time under the same PM rule.
+    Raises ValueError for anything that is not a time of day."""
+    if not isinstance(time_str, str) or not re.fullmatch(r'\s*\d{1,2}:[0-5]\d\s*', time_str):
+        raise ValueError(f'not a time: {time_str!r}')
+    minutes = time_to_minutes(time_str)
+    if not 0 <= minutes < 24 * 60:
+        raise ValueError(f'not a time of day: {time_str!r}')
+    return minutes
+
+def parse_class_time(time_str):
+    """Return (start, end) in minutes since midnight for a 'HH:MM-HH:MM' slot, or None"""
+    if not isinstance(time_str, str) or '-' not in time_str:
+        return None
+    try:
+        start_time, end_time = time_str.split('-')
+        return time_to_minutes(start_time), time_to_minutes(end_time)
+    except:
+        return None
+
+def format_minutes(minutes):
+    return f'{minutes // 60:02d}:{minutes % 60:02d}'